@@ -0,0 +1,61 @@
+"""report_job table
+
+Revision ID: 3f9a6c1d7b24
+Revises: 8d41c7a2e6f3
+Create Date: 2026-10-19 14:21:05.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a6c1d7b24'
+down_revision = '8d41c7a2e6f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted', sa.Boolean(), nullable=True),
+    sa.Column('uuid', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('progress', sa.Integer(), nullable=True),
+    sa.Column('period', sa.String(), nullable=True),
+    sa.Column('start', sa.DateTime(), nullable=True),
+    sa.Column('end', sa.DateTime(), nullable=True),
+    sa.Column('filters', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('file', sa.String(), nullable=True),
+    sa.Column('file_name', sa.String(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_report_job_company_id'), 'report_job', ['company_id'], unique=False)
+    op.create_index(op.f('ix_report_job_created_at'), 'report_job', ['created_at'], unique=False)
+    op.create_index(op.f('ix_report_job_deleted'), 'report_job', ['deleted'], unique=False)
+    op.create_index(op.f('ix_report_job_id'), 'report_job', ['id'], unique=False)
+    op.create_index(op.f('ix_report_job_status'), 'report_job', ['status'], unique=False)
+    op.create_index(op.f('ix_report_job_updated_at'), 'report_job', ['updated_at'], unique=False)
+    op.create_index(op.f('ix_report_job_user_id'), 'report_job', ['user_id'], unique=False)
+    op.create_index(op.f('ix_report_job_uuid'), 'report_job', ['uuid'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_report_job_uuid'), table_name='report_job')
+    op.drop_index(op.f('ix_report_job_user_id'), table_name='report_job')
+    op.drop_index(op.f('ix_report_job_updated_at'), table_name='report_job')
+    op.drop_index(op.f('ix_report_job_status'), table_name='report_job')
+    op.drop_index(op.f('ix_report_job_id'), table_name='report_job')
+    op.drop_index(op.f('ix_report_job_deleted'), table_name='report_job')
+    op.drop_index(op.f('ix_report_job_created_at'), table_name='report_job')
+    op.drop_index(op.f('ix_report_job_company_id'), table_name='report_job')
+    op.drop_table('report_job')
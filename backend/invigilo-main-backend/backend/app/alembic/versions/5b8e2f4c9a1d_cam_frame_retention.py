@@ -0,0 +1,27 @@
+"""cam_frame retention, company meta column
+
+Revision ID: 5b8e2f4c9a1d
+Revises: 12720265d7b9
+Create Date: 2026-10-19 09:12:41.203118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e2f4c9a1d'
+down_revision = '12720265d7b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('company', sa.Column('meta', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.create_index('ix_cam_frame_camera_id_created_at', 'cam_frame', ['camera_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_cam_frame_camera_id_created_at', table_name='cam_frame')
+    op.drop_column('company', 'meta')
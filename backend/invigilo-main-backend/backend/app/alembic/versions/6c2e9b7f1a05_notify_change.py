@@ -0,0 +1,62 @@
+"""notify_change triggers on streamed tables
+
+Revision ID: 6c2e9b7f1a05
+Revises: 3f9a6c1d7b24
+Create Date: 2026-10-19 16:02:47.503118
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6c2e9b7f1a05'
+down_revision = '3f9a6c1d7b24'
+branch_labels = None
+depends_on = None
+
+# same as settings.CHANGE_NOTIFY_CHANNEL
+CHANNEL = 'invigilo_changes'
+TABLES = ['camera', 'cam_ai_mapping', 'ai_sequence', 'ai_server', 'ai_vertex', 'ai_edge', 'incident']
+
+
+def upgrade():
+    op.execute(f'''
+create or replace function notify_change() returns trigger as $$
+declare
+	row jsonb;
+	cam_server_id integer;
+begin
+	if TG_OP = 'DELETE' then
+		row := to_jsonb(OLD);
+	else
+		row := to_jsonb(NEW);
+	end if;
+	if row ? 'cam_server_id' then
+		cam_server_id := (row->>'cam_server_id')::integer;
+	elsif row ? 'camera_id' then
+		select camera.cam_server_id into cam_server_id
+		from camera
+		where camera.id = (row->>'camera_id')::integer;
+	end if;
+	perform pg_notify('{CHANNEL}', json_build_object(
+		'table', TG_TABLE_NAME,
+		'op', TG_OP,
+		'id', row->'id',
+		'cam_server_id', cam_server_id
+	)::text);
+	return null;
+end;
+$$ language plpgsql
+''')
+    for table in TABLES:
+        op.execute(f'''
+create trigger {table}_notify_change
+after insert or update or delete on {table}
+for each row execute function notify_change()
+''')
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f'drop trigger if exists {table}_notify_change on {table}')
+    op.execute('drop function if exists notify_change()')
@@ -0,0 +1,91 @@
+"""incident_rollup table
+
+Revision ID: 8d41c7a2e6f3
+Revises: 5b8e2f4c9a1d
+Create Date: 2026-10-19 11:02:17.550431
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41c7a2e6f3'
+down_revision = '5b8e2f4c9a1d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('incident_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted', sa.Boolean(), nullable=True),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('cam_server_id', sa.Integer(), nullable=True),
+    sa.Column('camera_id', sa.Integer(), nullable=True),
+    sa.Column('type', sqlalchemy_utils.types.scalar_list.ScalarListType(), nullable=True),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('inaccurate_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['cam_server_id'], ['cam_server.id'], ),
+    sa.ForeignKeyConstraint(['camera_id'], ['camera.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('cam_server_id', 'camera_id', 'type', 'bucket', name='uq_incident_rollup_cam_server_id_camera_id_type_bucket')
+    )
+    op.create_index(op.f('ix_incident_rollup_bucket'), 'incident_rollup', ['bucket'], unique=False)
+    op.create_index(op.f('ix_incident_rollup_cam_server_id'), 'incident_rollup', ['cam_server_id'], unique=False)
+    op.create_index(op.f('ix_incident_rollup_camera_id'), 'incident_rollup', ['camera_id'], unique=False)
+    op.create_index(op.f('ix_incident_rollup_company_id'), 'incident_rollup', ['company_id'], unique=False)
+    op.create_index(op.f('ix_incident_rollup_created_at'), 'incident_rollup', ['created_at'], unique=False)
+    op.create_index(op.f('ix_incident_rollup_deleted'), 'incident_rollup', ['deleted'], unique=False)
+    op.create_index(op.f('ix_incident_rollup_id'), 'incident_rollup', ['id'], unique=False)
+    op.create_index(op.f('ix_incident_rollup_updated_at'), 'incident_rollup', ['updated_at'], unique=False)
+
+    # backfill, same as `app/incident_rollup_rebuild.py`
+    op.execute('''
+insert into incident_rollup (
+	company_id, cam_server_id, camera_id, type, bucket,
+	count, inaccurate_count, created_at, updated_at, deleted
+)
+select
+	cam_server.company_id,
+	camera.cam_server_id,
+	camera.id,
+	incident.type,
+	date_trunc('hour', incident.created_at) as bucket,
+	count(incident.id),
+	count(incident.id) filter (where incident.inaccurate = true),
+	now() at time zone 'utc',
+	now() at time zone 'utc',
+	false
+from
+	incident
+join camera on
+	camera.id = incident.camera_id
+join cam_server on
+	cam_server.id = camera.cam_server_id
+where
+	incident.deleted = false
+group by
+	cam_server.company_id,
+	camera.cam_server_id,
+	camera.id,
+	incident.type,
+	bucket
+''')
+
+
+def downgrade():
+    op.drop_index(op.f('ix_incident_rollup_updated_at'), table_name='incident_rollup')
+    op.drop_index(op.f('ix_incident_rollup_id'), table_name='incident_rollup')
+    op.drop_index(op.f('ix_incident_rollup_deleted'), table_name='incident_rollup')
+    op.drop_index(op.f('ix_incident_rollup_created_at'), table_name='incident_rollup')
+    op.drop_index(op.f('ix_incident_rollup_company_id'), table_name='incident_rollup')
+    op.drop_index(op.f('ix_incident_rollup_camera_id'), table_name='incident_rollup')
+    op.drop_index(op.f('ix_incident_rollup_cam_server_id'), table_name='incident_rollup')
+    op.drop_index(op.f('ix_incident_rollup_bucket'), table_name='incident_rollup')
+    op.drop_table('incident_rollup')
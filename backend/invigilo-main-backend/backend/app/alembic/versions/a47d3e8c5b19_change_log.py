@@ -0,0 +1,116 @@
+"""change_log table written by notify_change
+
+Revision ID: a47d3e8c5b19
+Revises: 6c2e9b7f1a05
+Create Date: 2026-10-19 17:36:12.240957
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a47d3e8c5b19'
+down_revision = '6c2e9b7f1a05'
+branch_labels = None
+depends_on = None
+
+# same as settings.CHANGE_NOTIFY_CHANNEL
+CHANNEL = 'invigilo_changes'
+
+
+def upgrade():
+    op.create_table('change_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted', sa.Boolean(), nullable=True),
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('cam_server_id', sa.Integer(), nullable=True),
+    sa.Column('op', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_change_log_cam_server_id'), 'change_log', ['cam_server_id'], unique=False)
+    op.create_index(op.f('ix_change_log_created_at'), 'change_log', ['created_at'], unique=False)
+    op.create_index(op.f('ix_change_log_deleted'), 'change_log', ['deleted'], unique=False)
+    op.create_index(op.f('ix_change_log_id'), 'change_log', ['id'], unique=False)
+    op.create_index(op.f('ix_change_log_table_name'), 'change_log', ['table_name'], unique=False)
+    op.create_index(op.f('ix_change_log_updated_at'), 'change_log', ['updated_at'], unique=False)
+
+    op.execute(f'''
+create or replace function notify_change() returns trigger as $$
+declare
+	row jsonb;
+	cam_server_id integer;
+	revision integer;
+begin
+	if TG_OP = 'DELETE' then
+		row := to_jsonb(OLD);
+	else
+		row := to_jsonb(NEW);
+	end if;
+	if row ? 'cam_server_id' then
+		cam_server_id := (row->>'cam_server_id')::integer;
+	elsif row ? 'camera_id' then
+		select camera.cam_server_id into cam_server_id
+		from camera
+		where camera.id = (row->>'camera_id')::integer;
+	end if;
+	insert into change_log (
+		table_name, row_id, cam_server_id, op, created_at, updated_at, deleted
+	)
+	values (
+		TG_TABLE_NAME, (row->>'id')::integer, cam_server_id, TG_OP,
+		now() at time zone 'utc', now() at time zone 'utc', false
+	)
+	returning id into revision;
+	perform pg_notify('{CHANNEL}', json_build_object(
+		'table', TG_TABLE_NAME,
+		'op', TG_OP,
+		'id', row->'id',
+		'cam_server_id', cam_server_id,
+		'revision', revision
+	)::text);
+	return null;
+end;
+$$ language plpgsql
+''')
+
+
+def downgrade():
+    op.execute(f'''
+create or replace function notify_change() returns trigger as $$
+declare
+	row jsonb;
+	cam_server_id integer;
+begin
+	if TG_OP = 'DELETE' then
+		row := to_jsonb(OLD);
+	else
+		row := to_jsonb(NEW);
+	end if;
+	if row ? 'cam_server_id' then
+		cam_server_id := (row->>'cam_server_id')::integer;
+	elsif row ? 'camera_id' then
+		select camera.cam_server_id into cam_server_id
+		from camera
+		where camera.id = (row->>'camera_id')::integer;
+	end if;
+	perform pg_notify('{CHANNEL}', json_build_object(
+		'table', TG_TABLE_NAME,
+		'op', TG_OP,
+		'id', row->'id',
+		'cam_server_id', cam_server_id
+	)::text);
+	return null;
+end;
+$$ language plpgsql
+''')
+    op.drop_index(op.f('ix_change_log_updated_at'), table_name='change_log')
+    op.drop_index(op.f('ix_change_log_table_name'), table_name='change_log')
+    op.drop_index(op.f('ix_change_log_id'), table_name='change_log')
+    op.drop_index(op.f('ix_change_log_deleted'), table_name='change_log')
+    op.drop_index(op.f('ix_change_log_created_at'), table_name='change_log')
+    op.drop_index(op.f('ix_change_log_cam_server_id'), table_name='change_log')
+    op.drop_table('change_log')
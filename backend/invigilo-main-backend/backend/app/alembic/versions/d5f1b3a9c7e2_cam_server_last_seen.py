@@ -0,0 +1,26 @@
+"""cam_server last_seen of heartbeat
+
+Revision ID: d5f1b3a9c7e2
+Revises: a47d3e8c5b19
+Create Date: 2026-10-19 22:04:51.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f1b3a9c7e2'
+down_revision = 'a47d3e8c5b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('cam_server', sa.Column('last_seen', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_cam_server_last_seen'), 'cam_server', ['last_seen'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_cam_server_last_seen'), table_name='cam_server')
+    op.drop_column('cam_server', 'last_seen')
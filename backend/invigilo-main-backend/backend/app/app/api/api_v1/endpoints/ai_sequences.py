@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.api import deps
 from app.api.api_v1.endpoints.utils import event_source_response
+from app.core.link_streams import link_stream
 from app.schemas.core import QueryParams
 
 from app.api.api_v1.router import APIRouter
@@ -136,7 +137,8 @@ def read_ai_sequence_by_link(
 def stream_ai_sequence_by_link(
     *, db: Session = Depends(deps.get_db),
     current_server: models.Cam_Server = Depends(deps.get_current_server),
-    request: Request
+    request: Request,
+    encoding: schemas.StreamEncoding = Depends()
 ):
     """
     Stream AI sequences by server through Access-Token.
@@ -144,11 +146,6 @@ def stream_ai_sequence_by_link(
 
     return event_source_response(
         db=db, request=request,
-        pull_fn=crud.ai_sequence.get_multi_by_link,
-        show_fields=[
-            'name', 'description', 'company_id', 'edges', 'vertexes',
-            'edges.source_id', 'edges.destination_id',
-            'vertexes.name', 'vertexes.types', 'vertexes.meta', 'vertexes.server_id',
-        ],
-        cam_server_id=current_server.id
+        encoding=encoding,
+        **link_stream('ai_sequences', current_server)
     )
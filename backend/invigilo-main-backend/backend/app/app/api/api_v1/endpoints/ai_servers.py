@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.api import deps
 from app.api.api_v1.endpoints.utils import event_source_response
+from app.core.link_streams import link_stream
 from app.schemas.core import QueryParams
 
 from app.api.api_v1.router import APIRouter
@@ -132,7 +133,8 @@ def read_ai_server_by_link(
 def stream_ai_server_by_link(
     *, db: Session = Depends(deps.get_db),
     current_server: models.Cam_Server = Depends(deps.get_current_server),
-    request: Request
+    request: Request,
+    encoding: schemas.StreamEncoding = Depends()
 ):
     """
     Stream AI servers by server through Access-Token.
@@ -140,8 +142,6 @@ def stream_ai_server_by_link(
 
     return event_source_response(
         db=db, request=request,
-        pull_fn=crud.ai_server.get_multi_by_link,
-        show_fields=['vertex_types', 'name', 'location', 'connection', 'is_active'],
-        cam_server_id=current_server.id,
-        company_id=current_server.company_id
+        encoding=encoding,
+        **link_stream('ai_servers', current_server)
     )
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.api import deps
 from app.api.api_v1.endpoints.utils import event_source_response
+from app.core.link_streams import link_stream
 from app.schemas.core import QueryParams
 
 from app.api.api_v1.router import APIRouter
@@ -138,7 +139,8 @@ def read_camera_ai_mapping_by_link(
 def stream_camera_ai_mapping_by_link(
     *, db: Session = Depends(deps.get_db),
     current_server: models.Cam_Server = Depends(deps.get_current_server),
-    request: Request
+    request: Request,
+    encoding: schemas.StreamEncoding = Depends()
 ):
     """
     Stream camera AI mapping by server through Access-Token.
@@ -146,7 +148,6 @@ def stream_camera_ai_mapping_by_link(
 
     return event_source_response(
         db=db, request=request,
-        pull_fn=crud.cam_ai_mapping.get_multi_by_link,
-        show_fields=['types', 'name', 'sequence_id', 'camera_id'],
-        cam_server_id=current_server.id,
+        encoding=encoding,
+        **link_stream('ai_mapping', current_server)
     )
@@ -1,10 +1,14 @@
 from typing import Any, List
 
-from fastapi import Depends, HTTPException, Request
+from fastapi import Depends, HTTPException, Request, Response, WebSocket, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app import crud, models, schemas
 from app.api import deps
+from app.core.bridge_config import bridge_config_cache
+from app.core.bridge_sync import BridgeSync, get_active_server
+from app.core.stream_hub import stream_hub
 from app.schemas.core import QueryParams
 
 from app.api.api_v1.router import APIRouter
@@ -109,6 +113,41 @@ def read_server_me(
     return server
 
 
+@router.get("/me/config", response_model=schemas.BridgeConfig, tags=['bridge'])
+def read_server_config_me(
+    *, db: Session = Depends(deps.get_db),
+    current_server: models.Cam_Server = Depends(deps.get_current_server),
+    request: Request
+):
+    """
+    Get cameras, AI mapping, AI sequences and AI servers of the server through Access-Token.
+
+    The response has `ETag` of the version, with `If-None-Match` of the same version returns 304 without content.
+    """
+    version, body = bridge_config_cache.get(db, current_server)
+    etag = f'"{version}"'
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and etag in [tag.strip().replace('W/', '', 1) for tag in if_none_match.split(',')]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@router.websocket("/me/sync")
+async def sync_server_me(websocket: WebSocket, encoding: schemas.StreamEncoding = Depends()):
+    """
+    Link streams, heartbeat, camera status and incident acks of the server on one WebSocket through Access-Token.
+    """
+    server = await run_in_threadpool(get_active_server, websocket.headers.get("Access-Token"))
+    if not server:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if stream_hub.is_full():
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    await websocket.accept()
+    await BridgeSync(websocket, server, encoding).run()
+
+
 @router.get("/{id:int}", response_model=schemas.Cam_Server)
 def read_server(
     *,
@@ -8,9 +8,11 @@ from sqlalchemy.orm import Session
 from sqlalchemy.sql import and_
 
 from app.core.config import settings
+from app.core.presence import presence_tracker
 from app import crud, models, schemas
 from app.api import deps
 from app.api.api_v1.endpoints.utils import event_source_response
+from app.core.link_streams import link_stream
 from app.schemas import QueryParams
 from app.schemas.cam_ai_mapping import Cam_AI_MappingCreate, Cam_AI_MappingUpdate
 
@@ -189,7 +191,31 @@ def update_camera_status(
     camera = crud.camera.get(db=db, id=id)
     if not camera or camera.cam_server_id != current_server.id:
         raise HTTPException(status_code=404, detail="Camera not found")
-    return crud.camera.update_status(db, db_obj=camera, obj_in=status_in)
+    camera = crud.camera.update_status(db, db_obj=camera, obj_in=status_in)
+    return camera
+
+
+@router.put("/status/link", response_model=List[schemas.CameraStatusItem], tags=['bridge'])
+def update_cameras_status_by_link(
+    *,
+    db: Session = Depends(deps.get_db),
+    status_in: schemas.CameraStatusBulk,
+    current_server: models.Cam_Server = Depends(deps.get_current_active_server),
+) -> Any:
+    """
+    Heartbeat of the server with the liveness of its cameras through Access-Token.
+
+    Returns only cameras which changed the state,
+    cameras of the server without heartbeat are marked offline after `CAMERA_PRESENCE_TTL`
+    """
+    changes = presence_tracker.heartbeat(
+        db, current_server.id,
+        {camera.id: camera.is_live for camera in status_in.cameras}
+    )
+    return [
+        schemas.CameraStatusItem(id=camera_id, is_live=is_live)
+        for camera_id, is_live in changes.items()
+    ]
 
 
 @router.post("/{id:int}/frame", response_model=schemas.CameraFrame, tags=['bridge'])
@@ -264,14 +290,14 @@ def read_cameras_by_link(
 def stream_cameras_by_link(
     *, db: Session = Depends(deps.get_db),
     current_server: models.User = Depends(deps.get_current_server),
-    request: Request
+    request: Request,
+    encoding: schemas.StreamEncoding = Depends()
 ):
     """
     Stream cameras by server through Access-Token.
     """
     return event_source_response(
         db=db, request=request,
-        pull_fn=crud.camera.get_multi_by_cam_server,
-        show_fields=['name', 'connection', 'is_active', 'location', 'company_id'],
-        cam_server_id=current_server.id
+        encoding=encoding,
+        **link_stream('cameras', current_server)
     )
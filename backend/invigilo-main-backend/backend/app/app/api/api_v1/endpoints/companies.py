@@ -1,8 +1,6 @@
 import mimetypes
 from typing import Any, List, Optional
 from uuid import uuid4
-import boto3
-from botocore.exceptions import NoCredentialsError
 
 from fastapi import Depends, File, HTTPException, UploadFile
 from sqlalchemy.orm import Session
@@ -66,6 +64,8 @@ async def update_company(
         raise HTTPException(status_code=404, detail="Company not found")
     if not crud.user.is_superuser(current_user) and (company.id != current_user.company_id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
+    if not crud.user.is_superuser(current_user):
+        company_in.meta = company.meta
     if company.logo != company_in.logo:
         if company_in.logo:
             company_logo = company_in.logo.replace('temp', 'company_logo')
@@ -1,14 +1,12 @@
-from typing import Any, Union
+from typing import Any, Dict, Union
 
-from fastapi import Depends, Request
+from fastapi import Body, Depends, HTTPException, Request
+from pydantic import ValidationError
 import orjson
 from datetime import datetime, timedelta
 from copy import deepcopy
 from sqlalchemy.orm import Session
-from telegram import ParseMode
-from telegram.error import BadRequest
 
-from app.schemas.telegram import Update, MessageEntityType, ChatType
 from app.core.config import settings
 from app.api import deps
 from app.crud import cam_server, incident
@@ -21,13 +19,21 @@ router = APIRouter()
 
 @router.post("/telegram/{secret}", dependencies=[Depends(deps.telegram_webhook_token)])
 async def telegram_webhook(
-    update: Update,
+    payload: Dict[str, Any] = Body(...),
     db: Session = Depends(deps.get_db),
     request: Request = None
 ) -> Any:
     """
     Retrieve Telegram Update, process commands.
     """
+    # Telegram models are loaded by the first update, the body is validated here
+    from telegram import ParseMode
+    from app.schemas.telegram import Update, MessageEntityType, ChatType
+
+    try:
+        update = Update.parse_obj(payload)
+    except ValidationError as e:
+        raise HTTPException(422, detail=e.errors())
     if update.callback_query:
         query = update.callback_query
         data = query.data
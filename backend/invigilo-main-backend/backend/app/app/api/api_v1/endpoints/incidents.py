@@ -3,12 +3,15 @@ from typing import Any, List, Optional
 from xmlrpc.client import boolean
 
 from fastapi import Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app import crud
 from app.api.api_v1.endpoints.utils import event_source_response
+from app.core.link_streams import link_stream
 from app.models import User, Cam_Server
-from app.schemas import Incident, IncidentExtra, IncidentCreate, IncidentUpdate, IncidentFilters
+from app.schemas import Incident, IncidentExtra, IncidentCreate, IncidentUpdate, IncidentFilters, IncidentExportFormat, StreamEncoding
+from app.core import incident_export
 from app.core.config import settings
 from app.api import deps
 from app.core.notification_bot import notification_bot
@@ -53,6 +56,36 @@ def read_incidents(
     return incidents
 
 
+@router.get("/export", response_model=Any)
+def export_incidents(
+    format: IncidentExportFormat = IncidentExportFormat.CSV,
+    type: Optional[List[int]] = Query(None),
+    filters: IncidentFilters = Depends(IncidentFilters),
+    current_user: User = Depends(deps.get_current_active_user),
+    company_id: int = None,
+) -> Any:
+    """
+    Stream incidents as CSV, NDJSON or Parquet file, with same filters as retrieve
+
+    When `superuser` export all, or
+    only records by own company
+    """
+    as_company_id = current_user.company_id
+    if current_user.is_superuser and company_id:
+        as_company_id = company_id
+    if not current_user.is_superuser and not as_company_id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    if type:
+        filters.type = ('string_array_contains', [str(t) for t in type])
+
+    content = incident_export.export_incidents(format, filters, as_company_id)
+    file_name = f'incidents_{datetime.utcnow().strftime("%Y-%m-%d")}.{format.value}'
+    return StreamingResponse(content, media_type=incident_export.MEDIA_TYPES[format], headers={
+        'Access-Control-Expose-Headers': 'Content-Disposition',
+        'Content-Disposition': f'attachment; filename="{file_name}"'
+    })
+
+
 @router.post("/", response_model=Incident, tags=['bridge'])
 def create_incident(
     *,
@@ -198,7 +231,8 @@ def mark_incident_inaccurate(
 def stream_incidents_by_link(
     *, db: Session = Depends(deps.get_db),
     current_server: Cam_Server = Depends(deps.get_current_server),
-    request: Request
+    request: Request,
+    encoding: StreamEncoding = Depends()
 ):
     """
     Stream incidents updated by server through Access-Token.
@@ -206,8 +240,6 @@ def stream_incidents_by_link(
 
     return event_source_response(
         db=db, request=request,
-        pull_fn=crud.incident.get_multi_updated_by_link,
-        show_fields=['uuid', 'ai_mapping_id', 'camera_id', 'acknowledged',
-                     'inaccurate', 'extra', 'created_at', 'updated_at'],
-        cam_server_id=current_server.id,
+        encoding=encoding,
+        **link_stream('incidents', current_server)
     )
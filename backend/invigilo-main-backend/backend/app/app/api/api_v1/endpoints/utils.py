@@ -1,19 +1,16 @@
-from copy import deepcopy
 from typing import Any, Callable, List
 
-from fastapi import Depends, Request
+from fastapi import Depends, HTTPException, Request
 from pydantic.networks import EmailStr
 
 from app import models, schemas
 from app.api import deps
 from app.core.celery_app import celery_app
 from app.core.notification_bot import notification_bot
-from app.schemas.core import QueryParams
+from app.core.stream_hub import stream_hub
 from app.utils import send_test_email
 
 import asyncio
-from datetime import datetime
-import orjson
 from sqlalchemy.orm import Session
 from time import sleep
 from sse_starlette import EventSourceResponse
@@ -58,104 +55,71 @@ def test_telegram(
     return notification_bot.test(chat_id)
 
 
+@router.get("/stream-metrics", response_model=Any)
+def read_stream_metrics(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Open streams and cost of their polls in this worker.
+    """
+    return stream_hub.metrics()
+
+
 def event_source_response(
     db: Session, request: Request,
     pull_fn: Callable, show_fields: List[str] = None,
     stream_delay: int = 10, exclude_events: List[str] = None,
+    tables: List[str] = None,
+    encoding: schemas.StreamEncoding = None,
     **kwargs
 ):
-    def response_filter(obj):
-        response = deepcopy(obj)
-        if exclude_events:
-            for event in exclude_events:
-                response.pop(event)
+    """
+    Stream of `new`, `updated` and `removed` records pulled by `pull_fn`,
+    pulled again on change of `tables` notified by `change_feed` or every `stream_delay` without it.
+    Connections with the same arguments share one producer of `stream_hub`, which pulls in the thread pool.
+    Events are tagged by revision, reconnection with `Last-Event-ID` replays the changes since the revision.
+    Binary `encoding` (MessagePack or compressed) is sent in base64.
+    """
+    encoding = encoding or schemas.StreamEncoding()
+    if stream_hub.is_full():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many streams",
+            headers={"Retry-After": str(stream_hub.retry_after())}
+        )
 
-        return response
+    last_event_id = request.headers.get("last-event-id")
+    revision = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
 
     async def event_publisher():
-
-        params = QueryParams(
-            skip=0,
-            limit=10000
+        events = stream_hub.listen(
+            pull_fn,
+            revision=revision,
+            idle_timeout=stream_delay,
+            show_fields=show_fields,
+            stream_delay=stream_delay,
+            exclude_events=exclude_events,
+            tables=tables,
+            **kwargs
         )
-        time_cursor = datetime.utcnow()
-        detector_ids = []
-        prev_response = None
-        response = {
-            "new": [],
-            "updated": [],
-            "removed": []
-        }
         try:
-            detectors = pull_fn(
-                db=db,
-                **kwargs,
-                params=params,
-                updated_before=time_cursor
-            )
-            detector_ids = [d.id for d in detectors]
-
-            response["new"] = [d.to_dict(show=show_fields) for d in detectors]
-
-            prev_response = orjson.dumps(response_filter(response))
-
-            yield dict(data=prev_response.decode("utf-8"))
-
-            while True:
-                response = {
-                    "new": [],
-                    "updated": [],
-                    "removed": []
-                }
-                disconnected = await request.is_disconnected()
-                if disconnected:
-                    print(f"Disconnecting client {request.client}")
-                    break
-                db.expire_all()
-                before_detectors_count = pull_fn(
-                    db=db, **kwargs, count=True, params=params, updated_before=time_cursor
-                )
-                after_detectors = pull_fn(
-                    db=db, **kwargs, params=params, updated_after=time_cursor
-                )
-
-                if before_detectors_count != len(detector_ids):
-                    detectors = pull_fn(
-                        db=db, **kwargs, params=params, updated_before=time_cursor
-                    )
-
-                    response["removed"] = detector_ids.copy()
-                    for d in detectors:
-                        if d.id in detector_ids:
-                            response["removed"].remove(d.id)
-
-                    for removedId in response["removed"]:
-                        detector_ids.remove(removedId)
-
-                for detector in after_detectors:
-                    if detector.id in detector_ids or detector.id in response["removed"]:
-                        detector_ids.append(detector.id)
-                        response["removed"].remove(detector.id)
-                        response["updated"].append(detector.to_dict(show=show_fields))
-                    else:
-                        detector_ids.append(detector.id)
-                        response["new"].append(detector.to_dict(show=show_fields))
-
-                current_response = orjson.dumps(response_filter(response))
-
-                if prev_response != current_response:
-                    prev_response = current_response
-                    time_cursor = datetime.utcnow()
-                    if len(response["new"]) or len(response["updated"]) or len(response["removed"]):
-                        yield dict(data=current_response.decode("utf-8"))
-                await asyncio.sleep(stream_delay)
+            async for event in events:
+                if event is None:
+                    if await request.is_disconnected():
+                        print(f"Disconnecting client {request.client}")
+                        break
+                    continue
+                event_revision, data = event
+                yield dict(id=str(event_revision), data=data.text(encoding))
             print(f"Disconnected from client {request.client}")
         except asyncio.CancelledError as e:
             print(f"Disconnected from client (via refresh/close) {request.client}")
             # Do any other cleanup, if any
             # raise e
+        finally:
+            await events.aclose()
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    # the producer pulls with its own sessions, the connection of the request is not kept for the stream
+    db.close()
 
     return EventSourceResponse(event_publisher())
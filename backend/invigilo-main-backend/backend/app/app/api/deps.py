@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 from starlette.requests import Request
 
 from app import crud, models, schemas
-from app.core import security
+from app.core.auth_cache import auth_cache
 from app.schemas.core import QueryModel, QueryParams
 from app.core.config import settings
 from app.db.session import SessionLocal
@@ -59,16 +59,13 @@ def get_current_user(
     else:
         authenticate_value = f"Bearer"
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = schemas.TokenPayload(**payload)
+        token_data = auth_cache.token_payload(token)
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = crud.user.get(db, id=token_data.sub)
+    user = auth_cache.user(db, token_data.sub, crud.user.get)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     for scope in security_scopes.scopes:
@@ -103,11 +100,8 @@ def get_user_or_server(db: Session = Depends(get_db), token: Optional[str] = Dep
 
     if token:
         try:
-            payload = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-            )
-            token_data = schemas.TokenPayload(**payload)
-            user = crud.user.get(db, id=token_data.sub)
+            token_data = auth_cache.token_payload(token)
+            user = auth_cache.user(db, token_data.sub, crud.user.get)
         except (jwt.JWTError, ValidationError):
             pass
 
@@ -0,0 +1,76 @@
+from time import time
+from typing import Callable, Optional
+
+from jose import jwt
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core import security
+from app.core.cache import CacheBackend, MemoryCacheBackend
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.token import TokenPayload
+
+
+class AuthCache:
+    '''
+    Decoded JWT payloads by token signature and snapshots of users by id, kept for `ttl`
+    so authenticated requests don't decode the token and query the user each time.
+
+    Payloads are kept at most until `exp` of the token. Snapshots are dropped on update
+    and removal of the user by `crud.user`, other workers see the change after `ttl`.
+    '''
+
+    def __init__(self, backend: CacheBackend, ttl: int = settings.AUTH_CACHE_TTL) -> None:
+        self.backend = backend
+        self.ttl = ttl
+
+    def token_payload(self, token: str) -> TokenPayload:
+        '''
+        Payload of valid token, raises `jwt.JWTError` or `ValidationError` as `jwt.decode`
+        '''
+        # the signature covers header and payload
+        key = f'auth-token:{token.rsplit(".", 1)[-1]}'
+        cached = self.backend.get(key)
+        if cached and cached[0] == token:
+            return cached[1]
+
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+        token_data = TokenPayload(**payload)
+        ttl = self.ttl
+        if payload.get('exp'):
+            ttl = min(ttl, int(payload['exp'] - time()))
+        if ttl > 0:
+            self.backend.set(key, (token, token_data), ttl=ttl)
+        return token_data
+
+    def user(self, db: Session, id: int, get_fn: Callable[..., Optional[User]]) -> Optional[User]:
+        '''
+        User attached to the session `db`, from the snapshot without query or by `get_fn`
+        '''
+        if id is None:
+            return None
+        key = f'auth-user:{id}'
+        snapshot = self.backend.get(key)
+        if snapshot is not None:
+            # copy of the snapshot in the session, relationships are loaded on access
+            return db.merge(snapshot, load=False)
+
+        user = get_fn(db, id=id)
+        if user:
+            self.backend.set(key, self.snapshot(user), ttl=self.ttl)
+        return user
+
+    def snapshot(self, user: User) -> User:
+        # detached copy of the columns, the instance of the request can be changed
+        snapshot = User(**{
+            attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs
+        })
+        make_transient_to_detached(snapshot)
+        return snapshot
+
+    def invalidate_user(self, id: int) -> None:
+        self.backend.delete(f'auth-user:{id}')
+
+
+auth_cache = AuthCache(MemoryCacheBackend(max_entries=settings.AUTH_CACHE_MAX_ENTRIES))
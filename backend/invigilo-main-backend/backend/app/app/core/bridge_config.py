@@ -0,0 +1,64 @@
+import hashlib
+from typing import Any, Dict, List, Tuple
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.core.cache import CacheBackend, MemoryCacheBackend
+from app.core.config import settings
+
+# tables of the configuration, changes are logged in `change_log`
+CONFIG_TABLES = ['camera', 'cam_ai_mapping', 'ai_sequence', 'ai_vertex', 'ai_edge', 'ai_server']
+
+
+def sorted_by_id(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # queries are not ordered, the hash must not depend on the order of rows
+    return sorted(items, key=lambda item: item['id'])
+
+
+def build_bridge_config(db: Session, server: models.Cam_Server) -> Tuple[str, bytes]:
+    """
+    Configuration of the server as `(version, serialized config)`, the version is sha256 of the content
+    """
+    config = schemas.BridgeConfig(
+        cameras=crud.camera.get_multi_by_cam_server(db, cam_server_id=server.id),
+        ai_mapping=crud.cam_ai_mapping.get_multi_by_link(db, cam_server_id=server.id),
+        ai_sequences=crud.ai_sequence.get_multi_by_link(db, cam_server_id=server.id),
+        ai_servers=crud.ai_server.get_multi_by_link(db, cam_server_id=server.id, company_id=server.company_id),
+    )
+    content = jsonable_encoder(config, exclude={'version'})
+    for key in ('cameras', 'ai_mapping', 'ai_sequences', 'ai_servers'):
+        content[key] = sorted_by_id(content[key])
+    for sequence in content['ai_sequences']:
+        sequence['vertexes'] = sorted_by_id(sequence['vertexes'] or [])
+        sequence['edges'] = sorted_by_id(sequence['edges'] or [])
+
+    version = hashlib.sha256(orjson.dumps(content, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return version, orjson.dumps({'version': version, **content})
+
+
+class BridgeConfigCache:
+    '''
+    Serialized configuration per server, built again when a row of `CONFIG_TABLES`
+    of the server changed (by revision of `change_log`) or after `ttl` for changes of other tables
+    '''
+
+    def __init__(self, backend: CacheBackend, ttl: int = settings.BRIDGE_CONFIG_CACHE_TTL) -> None:
+        self.backend = backend
+        self.ttl = ttl
+
+    def get(self, db: Session, server: models.Cam_Server) -> Tuple[str, bytes]:
+        revision = crud.change_log.get_revision(db, tables=CONFIG_TABLES, cam_server_id=server.id)
+        key = f'bridge-config:{server.id}'
+        cached = self.backend.get(key)
+        if cached and cached[0] == revision:
+            return cached[1], cached[2]
+
+        version, body = build_bridge_config(db, server)
+        self.backend.set(key, (revision, version, body), ttl=self.ttl)
+        return version, body
+
+
+bridge_config_cache = BridgeConfigCache(MemoryCacheBackend())
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Union
+
+import msgpack
+import orjson
+from fastapi import HTTPException
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from app import crud, models, schemas
+from app.core.config import settings
+from app.core.link_streams import LINK_STREAMS, link_stream
+from app.core.presence import presence_tracker
+from app.core.stream_encoding import StreamEvent, is_binary
+from app.core.stream_hub import stream_hub
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def get_active_server(access_token: Optional[str]) -> Optional[models.Cam_Server]:
+    if not access_token:
+        return None
+    db = SessionLocal()
+    try:
+        server = crud.cam_server.get_by_access_token(db, access_token=access_token)
+        if not server or not crud.cam_server.is_active(server):
+            return None
+        return server
+    finally:
+        db.close()
+
+
+class BridgeSync:
+    '''
+    Link streams of a bridge multiplexed on one WebSocket, with heartbeat,
+    camera status and incident acks sent by the bridge on the same connection.
+
+    The bridge sends `schemas.BridgeSyncMessage`, the server sends
+    `{"type": "event", "channel", "id", "data"}` for events of the subscribed channels,
+    `{"type": "closed", "channel", "id"}` when the channel has to be subscribed again from `id`,
+    replies with the same `type` and `ref` as the message and `{"type": "error", "ref", "status_code", "detail"}`.
+
+    Events are binary frames with MessagePack `encoding` (compressed `data` as bin),
+    compressed `data` of JSON events is base64 string. Replies are always JSON text.
+    '''
+
+    def __init__(
+        self, websocket: WebSocket, server: models.Cam_Server, encoding: schemas.StreamEncoding = None
+    ) -> None:
+        self.websocket = websocket
+        self.server = server
+        self.encoding = encoding or schemas.StreamEncoding()
+        # channel -> task forwarding the events of the stream
+        self.channels: Dict[str, asyncio.Task] = {}
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=settings.STREAM_QUEUE_SIZE)
+
+    async def run(self) -> None:
+        writer = asyncio.create_task(self.write())
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("text") is None:
+                    await self.send({"type": "error", "ref": None, "status_code": 422, "detail": "Messages are JSON text"})
+                    continue
+                await self.handle(message["text"])
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in self.channels.values():
+                task.cancel()
+            writer.cancel()
+
+    async def write(self) -> None:
+        while True:
+            frame = await self.outbox.get()
+            if isinstance(frame, bytes):
+                await self.websocket.send_bytes(frame)
+            else:
+                await self.websocket.send_text(frame)
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        await self.outbox.put(orjson.dumps(message).decode("utf-8"))
+
+    async def forward(self, channel: str, revision: int = None) -> None:
+        events = stream_hub.listen(revision=revision, **link_stream(channel, self.server))
+        try:
+            async for event_revision, event in events:
+                revision = event_revision
+                await self.outbox.put(self.event_frame(channel, event_revision, event))
+        finally:
+            await events.aclose()
+        self.channels.pop(channel, None)
+        await self.send({"type": "closed", "channel": channel, "id": revision})
+
+    def event_frame(self, channel: str, revision: int, event: StreamEvent) -> Union[str, bytes]:
+        # `data` is encoded once for all connections of the stream and embedded without decoding
+        data = event.encode(self.encoding)
+        if self.encoding.format == schemas.StreamFormat.MSGPACK:
+            if self.encoding.compression != schemas.StreamCompression.NONE:
+                data = msgpack.packb(data)
+            # MessagePack values are concatenated, map of 4 items
+            return b'\x84' + b''.join(
+                msgpack.packb(value) for value in ("type", "event", "channel", channel, "id", revision, "data")
+            ) + data
+        if is_binary(self.encoding):
+            data = orjson.dumps(event.text(self.encoding))
+        return f'{{"type":"event","channel":"{channel}","id":{revision},"data":{data.decode("utf-8")}}}'
+
+    async def handle(self, text: str) -> None:
+        try:
+            message = schemas.BridgeSyncMessage(**orjson.loads(text))
+        except (orjson.JSONDecodeError, TypeError, ValidationError) as e:
+            await self.send({"type": "error", "ref": None, "status_code": 422, "detail": str(e)})
+            return
+
+        try:
+            reply = await self.dispatch(message)
+        except HTTPException as e:
+            await self.send({"type": "error", "ref": message.ref, "status_code": e.status_code, "detail": e.detail})
+            return
+        await self.send({"type": message.type.value, "ref": message.ref, **reply})
+
+    async def dispatch(self, message: schemas.BridgeSyncMessage) -> Dict[str, Any]:
+        if message.type == schemas.BridgeSyncMessageType.SUBSCRIBE:
+            unknown = [channel for channel in message.channels if channel not in LINK_STREAMS]
+            if unknown:
+                raise HTTPException(status_code=404, detail=f"Channels not found: {', '.join(unknown)}")
+            for channel in message.channels:
+                self.unsubscribe(channel)
+                self.channels[channel] = asyncio.create_task(
+                    self.forward(channel, message.revisions.get(channel))
+                )
+            return {"channels": list(self.channels)}
+
+        if message.type == schemas.BridgeSyncMessageType.UNSUBSCRIBE:
+            for channel in message.channels:
+                self.unsubscribe(channel)
+            return {"channels": list(self.channels)}
+
+        if message.type == schemas.BridgeSyncMessageType.HEARTBEAT:
+            changes = await run_in_threadpool(self.heartbeat, message)
+            return {"cameras": [{"id": camera_id, "is_live": is_live} for camera_id, is_live in changes.items()]}
+
+        if message.id is None:
+            raise HTTPException(status_code=422, detail="Missing id")
+
+        if message.type == schemas.BridgeSyncMessageType.CAMERA_STATUS:
+            if message.is_live is None:
+                raise HTTPException(status_code=422, detail="Missing is_live")
+            is_live = await run_in_threadpool(self.camera_status, message.id, message.is_live)
+            return {"id": message.id, "is_live": is_live}
+
+        acknowledged = await run_in_threadpool(self.incident_ack, message.id)
+        return {"id": message.id, "acknowledged": acknowledged.isoformat()}
+
+    def unsubscribe(self, channel: str) -> None:
+        task = self.channels.pop(channel, None)
+        if task:
+            task.cancel()
+
+    def heartbeat(self, message: schemas.BridgeSyncMessage) -> Dict[int, bool]:
+        db = SessionLocal()
+        try:
+            return presence_tracker.heartbeat(
+                db, self.server.id,
+                {camera.id: camera.is_live for camera in message.cameras}
+            )
+        finally:
+            db.close()
+
+    def camera_status(self, id: int, is_live: bool) -> bool:
+        db = SessionLocal()
+        try:
+            camera = crud.camera.get(db=db, id=id)
+            if not camera or camera.cam_server_id != self.server.id:
+                raise HTTPException(status_code=404, detail="Camera not found")
+            camera = crud.camera.update_status(db, db_obj=camera, obj_in=schemas.CameraStatus(is_live=is_live))
+            return camera.is_live
+        finally:
+            db.close()
+
+    def incident_ack(self, id: int) -> datetime:
+        db = SessionLocal()
+        try:
+            incident = crud.incident.get(db=db, id=id)
+            if not incident or not incident.camera or incident.camera.cam_server_id != self.server.id:
+                raise HTTPException(status_code=404, detail="Incident not found")
+            if incident.created_at + timedelta(seconds=settings.NOTIFICATION_TIME_WINDOW) < datetime.utcnow():
+                raise HTTPException(status_code=400, detail="Action expired")
+            incident = crud.incident.mark_acknowledged(db, id, None)
+            return incident.acknowledged
+        finally:
+            db.close()
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from importlib import import_module
+from threading import Lock
+from time import monotonic
+from typing import Any, Optional
+
+
+class CacheBackend:
+    '''
+    Interface for cache storage, can be shared between processes
+    '''
+
+    def get(self, key: str) -> Optional[Any]:
+        pass
+
+    def set(self, key: str, value: Any, ttl: int = None) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def incr(self, key: str) -> int:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    '''
+    In-process cache with TTL and LRU eviction
+    '''
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self.lock = Lock()
+        # key -> (expiry time or None, value)
+        self.entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires <= monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int = None) -> None:
+        expires = monotonic() + ttl if ttl else None
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self.lock:
+            expires, value = self.entries.get(key, (None, 0))
+            value += 1
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            return value
+
+
+def load_cache_backend(path: str, **kwargs) -> CacheBackend:
+    '''
+    Instance of backend by dotted path e.g. `app.core.cache.MemoryCacheBackend`
+    '''
+    module_name, class_name = path.rsplit('.', 1)
+    return getattr(import_module(module_name), class_name)(**kwargs)
@@ -1,6 +1,23 @@
 from celery import Celery
+from celery.schedules import crontab
+
+from app.core.config import settings
 
 celery_app = Celery("worker", broker="amqp://guest@queue//")
 
 celery_app.conf.task_create_missing_queues = True
 celery_app.conf.task_routes = {"app.worker.*": "main-queue"}
+celery_app.conf.beat_schedule = {
+    "cam-frame-retention": {
+        "task": "app.worker.cam_frame_retention",
+        "schedule": settings.CAM_FRAME_RETENTION_SCHEDULE,
+    },
+    "change-log-trim": {
+        "task": "app.worker.change_log_trim",
+        "schedule": settings.CHANGE_LOG_TRIM_SCHEDULE,
+    },
+    "period-reports": {
+        "task": "app.worker.period_reports",
+        "schedule": crontab(hour=settings.REPORT_SCHEDULE_HOUR, minute=settings.REPORT_SCHEDULE_MINUTE),
+    },
+}
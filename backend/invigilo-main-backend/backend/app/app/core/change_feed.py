@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import select
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+import psycopg2
+import psycopg2.extensions
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    '''
+    Streamed tables of a cam server, `event` is set on their change
+    '''
+
+    def __init__(self, tables: Iterable[str], cam_server_id: int = None) -> None:
+        self.tables = set(tables)
+        self.cam_server_id = cam_server_id
+        self.event = asyncio.Event()
+
+    def matches(self, change: Dict[str, Any]) -> bool:
+        if change.get('table') not in self.tables:
+            return False
+        # changes not resolved to a cam server wake all streams of the table
+        cam_server_id = change.get('cam_server_id')
+        return cam_server_id is None or self.cam_server_id is None or int(cam_server_id) == self.cam_server_id
+
+    async def wait(self, timeout: float) -> bool:
+        '''
+        Wait for a change at most `timeout` seconds, returns whether changed
+        '''
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+class ChangeFeed:
+    '''
+    Changes of rows notified by Postgres triggers (`NOTIFY` on `CHANGE_NOTIFY_CHANNEL`
+    with `{table, id, cam_server_id}`), received by one listener thread per process
+    and dispatched to the subscribed streams in the event loop.
+
+    While the listener is disconnected `connected` is false and streams fall back to polling.
+    '''
+
+    def __init__(self, channel: str = settings.CHANGE_NOTIFY_CHANNEL) -> None:
+        self.channel = channel
+        self.subscriptions: Dict[int, Subscription] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.connected = False
+        self.stopped = threading.Event()
+
+    def subscribe(self, tables: Iterable[str], cam_server_id: int = None) -> Subscription:
+        subscription = Subscription(tables, cam_server_id)
+        self.subscriptions[id(subscription)] = subscription
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.pop(id(subscription), None)
+
+    def dispatch(self, change: Dict[str, Any]) -> None:
+        for subscription in list(self.subscriptions.values()):
+            if subscription.matches(change):
+                subscription.event.set()
+
+    def wake_all(self) -> None:
+        # changes may be missed while reconnecting
+        for subscription in list(self.subscriptions.values()):
+            subscription.event.set()
+
+    def start(self, loop: asyncio.AbstractEventLoop = None) -> None:
+        if self.thread:
+            return
+        self.loop = loop or asyncio.get_event_loop()
+        self.thread = threading.Thread(target=self.listen, name='change-feed', daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def listen(self) -> None:
+        retry_delay = 1
+        while not self.stopped.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(settings.SQLALCHEMY_DATABASE_URI)
+                connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                self.connected = True
+                self.loop.call_soon_threadsafe(self.wake_all)
+                retry_delay = 1
+
+                while not self.stopped.is_set():
+                    if select.select([connection], [], [], 5) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        try:
+                            change = orjson.loads(notify.payload)
+                        except orjson.JSONDecodeError:
+                            continue
+                        self.loop.call_soon_threadsafe(self.dispatch, change)
+            except Exception as e:
+                logger.error(f"Change feed disconnected: {e}")
+            finally:
+                if self.connected:
+                    # back to polling
+                    self.connected = False
+                    self.loop.call_soon_threadsafe(self.wake_all)
+                if connection:
+                    connection.close()
+            self.stopped.wait(retry_delay)
+            retry_delay = min(retry_delay * 2, 60)
+
+
+change_feed = ChangeFeed()
@@ -92,6 +92,33 @@ class Settings(BaseSettings):
 
     NOTIFICATION_TIME_WINDOW: int = 5 * 60 # in seconds
     CAMERA_ACTIVITY_INTERVAL: int = 24 * 60 * 60 # in seconds
+    CAMERA_PRESENCE_TTL: int = 60 # in seconds (cameras of silent bridge are marked offline)
+    CAMERA_PRESENCE_SWEEP_INTERVAL: int = 10 # in seconds (also how often `last_seen` of live bridge is written)
+
+    # NOTE: streams are woken by the change notifications, polled every STREAM_FALLBACK_INTERVAL anyway
+    CHANGE_NOTIFY_CHANNEL: str = 'invigilo_changes'
+    STREAM_FALLBACK_INTERVAL: int = 60 # in seconds
+    # events buffered per connection, slower connections are closed
+    STREAM_QUEUE_SIZE: int = 16
+    # NOTE: streams pull only rows updated since the last poll, all rows every STREAM_RECONCILE_INTERVAL
+    # NOTE: rows leaving a stream without soft delete (moved camera, incident out of the window) are removed this late
+    STREAM_RECONCILE_INTERVAL: int = 5 * 60 # in seconds
+    STREAM_CURSOR_OVERLAP: int = 5 # in seconds
+    # NOTE: without change feed the poll delay doubles while nothing changes, up to STREAM_MAX_DELAY
+    STREAM_MAX_DELAY: int = 60 # in seconds
+    STREAM_DELAY_JITTER: float = 0.2 # fraction of the delay
+    # NOTE: connections over STREAM_MAX_CONNECTIONS per worker are rejected with 503 and Retry-After
+    STREAM_MAX_CONNECTIONS: int = 2000
+    STREAM_RETRY_AFTER: int = 30 # in seconds
+    # NOTE: reconnected streams resume from Last-Event-ID while the revision is in the change log
+    CHANGE_LOG_RETENTION: int = 60 * 60 * 24 # in seconds
+    CHANGE_LOG_TRIM_SCHEDULE: int = 60 * 60 # in seconds (how often trim task runs)
+    CHANGE_LOG_REPLAY_OVERLAP: int = 5 # in seconds (changes before Last-Event-ID replayed again)
+    # NOTE: config of the bridge is built again on change of its rows or after BRIDGE_CONFIG_CACHE_TTL
+    BRIDGE_CONFIG_CACHE_TTL: int = 60 # in seconds
+    # NOTE: decoded tokens and users of authenticated requests are cached per worker for AUTH_CACHE_TTL
+    AUTH_CACHE_TTL: int = 30 # in seconds (changes of users made by other workers are seen after it)
+    AUTH_CACHE_MAX_ENTRIES: int = 4096
 
     # NOTE: COEFFICIENTS should respect (ALPHA + BETA + GAMMA + SIGMA = 1.0)
     GAUGE_ALPHA_INTERVAL: int = 7 * 24 * 60 * 60 # in seconds (past week: 604800)
@@ -103,6 +130,42 @@ class Settings(BaseSettings):
     GAUGE_SIGMA_INTERVAL: int = 1 * 60 * 60 # in seconds (last 3 hours: 10800)
     GAUGE_SIGMA_COEFFICIENT: float = 0.4
 
+    PDF_GRAPH_WORKERS: int = 2 # processes rendering graphs of PDF reports
+    PDF_GRAPH_FORMAT: str = 'png' # or `svg`, can be set per graph by `format` param of `graph://` url
+
+    # NOTE: incidents of PDF reports are listed up to REPORT_INCIDENTS_MAX,
+    # periods longer than REPORT_INCIDENTS_SUMMARY_INTERVAL are summarized by location and type
+    # and list only REPORT_INCIDENTS_SUMMARY_MAX incidents
+    REPORT_INCIDENTS_MAX: int = 2000
+    REPORT_INCIDENTS_SUMMARY_INTERVAL: int = 7 * 24 * 60 * 60 # in seconds
+    REPORT_INCIDENTS_SUMMARY_MAX: int = 200
+    REPORT_INCIDENTS_BATCH_SIZE: int = 500
+    INCIDENTS_EXPORT_BATCH_SIZE: int = 5000 # in rows (fetched per query of streamed incident exports)
+    REPORT_THUMBNAIL_SIZE: int = 480 # in pixels (longer side of the frame)
+    REPORT_THUMBNAIL_WORKERS: int = 8
+    REPORT_THUMBNAIL_CACHE_DIR: str = '/tmp/report-thumbnails'
+    REPORT_THUMBNAIL_CACHE_TTL: int = 7 * 24 * 60 * 60 # in seconds (since the last use of a thumbnail)
+    REPORT_THUMBNAIL_CACHE_MAX_SIZE: int = 512 * 1024 * 1024 # in bytes (least recently used are removed over it)
+    REPORT_THUMBNAIL_SWEEP_INTERVAL: int = 60 * 60 # in seconds
+
+    # NOTE: reports of closed periods are generated daily at REPORT_SCHEDULE_HOUR:REPORT_SCHEDULE_MINUTE (UTC)
+    REPORT_SCHEDULE_HOUR: int = 0
+    REPORT_SCHEDULE_MINUTE: int = 15
+    REPORT_SCHEDULE_PERIODS: List[str] = ['day', 'week', 'month']
+
+    # NOTE: reports of ranges ended before NOTIFICATION_TIME_WINDOW are cached until evicted
+    REPORT_CACHE_BACKEND: str = None # dotted path of `app.core.cache.CacheBackend`, in-process when not set
+    REPORT_CACHE_MAX_ENTRIES: int = 1024
+    REPORT_CACHE_OPEN_TTL: int = 60 # in seconds (reports including the current bucket)
+
+    # NOTE: defaults for Cam_Frame retention, can be overridden per company by `Company.meta['frame_retention']`
+    CAM_FRAME_RETENTION_SCHEDULE: int = 60 * 60 # in seconds (how often retention task runs)
+    CAM_FRAME_HOT_INTERVAL: int = 24 * 60 * 60 # in seconds (keep all frames of the past day)
+    CAM_FRAME_DOWNSAMPLE_INTERVAL: int = 10 * 60 # in seconds (afterwards keep one frame per camera per 10 minutes)
+    CAM_FRAME_EXPIRE_INTERVAL: int = 30 * 24 * 60 * 60 # in seconds (hard-delete frames older than 30 days)
+    CAM_FRAME_RETENTION_BATCH_SIZE: int = 1000
+    CAM_FRAME_DELETE_UPLOADS: bool = False
+
     class Config:
         case_sensitive = True
 
@@ -0,0 +1,155 @@
+import csv
+from io import RawIOBase, StringIO
+from typing import Any, Dict, Iterable, Iterator, List
+
+import orjson
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import Incident
+from app.schemas.incident import IncidentExportFormat, IncidentFilters
+
+# exported fields, uploads are exported as S3 keys without signing
+EXPORT_COLUMNS = [
+    Incident.id, Incident.uuid, Incident.type, Incident.camera_id, Incident.location,
+    Incident.acknowledged, Incident.inaccurate, Incident.count, Incident.people, Incident.objects,
+    Incident.frame, Incident.video, Incident.created_at, Incident.updated_at,
+]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {
+    IncidentExportFormat.CSV: 'text/csv',
+    IncidentExportFormat.NDJSON: 'application/x-ndjson',
+    IncidentExportFormat.PARQUET: 'application/vnd.apache.parquet',
+}
+
+
+def export_row(row) -> Dict[str, Any]:
+    data = row._asdict()
+    data['uuid'] = str(data['uuid']) if data['uuid'] else None
+    data['type'] = [int(t_index) for t_index in data['type'] or []]
+    return data
+
+
+def iter_batches(
+    filters: IncidentFilters = None,
+    company_id: int = None,
+    batch_size: int = None
+) -> Iterator[List[Dict[str, Any]]]:
+    '''
+    Rows from a server-side cursor in batches, the session is owned by the iterator
+    as the response is streamed after the request dependencies
+    '''
+    batch_size = batch_size or settings.INCIDENTS_EXPORT_BATCH_SIZE
+    db: Session = SessionLocal()
+    try:
+        query = (
+            crud.incident.query_by_filters(db, filters, company_id, entities=EXPORT_COLUMNS)
+            .order_by(Incident.id)
+            .execution_options(stream_results=True)
+            .yield_per(batch_size)
+        )
+        batch = []
+        for row in query:
+            batch.append(export_row(row))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        db.close()
+
+
+def iter_csv(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for batch in batches:
+        for row in batch:
+            row['type'] = ','.join(str(t_index) for t_index in row['type'])
+            writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b''.join(orjson.dumps(row) + b'\n' for row in batch)
+
+
+class ChunkSink(RawIOBase):
+    '''
+    Write-only file collecting written bytes until taken by `pop`
+    '''
+
+    def __init__(self) -> None:
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def pop(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_parquet(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    '''
+    Each batch is written as one row group
+    '''
+    # loaded by the first Parquet export
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('uuid', pa.string()),
+        ('type', pa.list_(pa.int32())),
+        ('camera_id', pa.int64()),
+        ('location', pa.string()),
+        ('acknowledged', pa.timestamp('us')),
+        ('inaccurate', pa.bool_()),
+        ('count', pa.int32()),
+        ('people', pa.int32()),
+        ('objects', pa.int32()),
+        ('frame', pa.string()),
+        ('video', pa.string()),
+        ('created_at', pa.timestamp('us')),
+        ('updated_at', pa.timestamp('us')),
+    ])
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.pop()
+    finally:
+        writer.close()
+    yield sink.pop()
+
+
+def export_incidents(
+    export_format: IncidentExportFormat,
+    filters: IncidentFilters = None,
+    company_id: int = None
+) -> Iterator:
+    if export_format == IncidentExportFormat.PARQUET:
+        return iter_parquet(iter_batches(filters, company_id))
+    if export_format == IncidentExportFormat.NDJSON:
+        return iter_ndjson(iter_batches(filters, company_id))
+    return iter_csv(iter_batches(filters, company_id))
@@ -0,0 +1,49 @@
+from typing import Any, Dict
+
+from app import crud, models
+
+# channels of the bridge, the first of `tables` is the table of the records
+LINK_STREAMS: Dict[str, Dict[str, Any]] = {
+    'cameras': {
+        'pull_fn': crud.camera.get_multi_by_cam_server,
+        'show_fields': ('name', 'connection', 'is_active', 'location', 'company_id'),
+        'tables': ('camera',),
+    },
+    'ai_sequences': {
+        'pull_fn': crud.ai_sequence.get_multi_by_link,
+        'show_fields': (
+            'name', 'description', 'company_id', 'edges', 'vertexes',
+            'edges.source_id', 'edges.destination_id',
+            'vertexes.name', 'vertexes.types', 'vertexes.meta', 'vertexes.server_id',
+        ),
+        'tables': ('ai_sequence', 'ai_vertex', 'ai_edge', 'cam_ai_mapping'),
+    },
+    'ai_servers': {
+        'pull_fn': crud.ai_server.get_multi_by_link,
+        'show_fields': ('vertex_types', 'name', 'location', 'connection', 'is_active'),
+        'tables': ('ai_server', 'ai_vertex', 'cam_ai_mapping'),
+        'with_company': True,
+    },
+    'ai_mapping': {
+        'pull_fn': crud.cam_ai_mapping.get_multi_by_link,
+        'show_fields': ('types', 'name', 'sequence_id', 'camera_id'),
+        'tables': ('cam_ai_mapping',),
+    },
+    'incidents': {
+        'pull_fn': crud.incident.get_multi_updated_by_link,
+        'show_fields': ('uuid', 'ai_mapping_id', 'camera_id', 'acknowledged',
+                        'inaccurate', 'extra', 'created_at', 'updated_at'),
+        'tables': ('incident',),
+    },
+}
+
+
+def link_stream(channel: str, server: models.Cam_Server) -> Dict[str, Any]:
+    '''
+    Arguments of `event_source_response` or `stream_hub.listen` for the stream of `channel` of the server
+    '''
+    options = {**LINK_STREAMS[channel]}
+    options['cam_server_id'] = server.id
+    if options.pop('with_company', False):
+        options['company_id'] = server.company_id
+    return options
@@ -1,6 +1,12 @@
 import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from html import unescape
 from io import BytesIO
-from typing import Dict, List, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from weasyprint import HTML, CSS, default_url_fetcher
 from weasyprint.text.fonts import FontConfiguration
@@ -8,11 +14,24 @@ from weasyprint.text.fonts import FontConfiguration
 from weasyprint.logger import LOGGER as weayprint_logger
 from mako.template import Template
 
-import matplotlib.pyplot as plt
-import pandas as pd
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sbn
 from urllib.parse import urlparse, parse_qs
 
+from app.core.config import settings
+from app.schemas.report_job import REPORT_PROGRESS_STEPS
+
+# headless, figures are rendered without pyplot
+matplotlib.use('Agg')
+
+GRAPH_URL_PATTERN = re.compile(r'''src=["'](graph://[^"']+)["']''')
+GRAPH_MIME_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
 
 class LoggerFilter(logging.Filter):
     def filter(self, record):
@@ -21,34 +40,179 @@ class LoggerFilter(logging.Filter):
         return False
 
 
+# logs `Step N - ...` of the layout
+progress_logger = logging.getLogger('weasyprint.progress')
+
+
+class ProgressHandler(logging.Handler):
+    '''
+    Calls `callback` with the number of each `Step N - ...` logged by WeasyPrint in the current thread
+    '''
+    STEP_PATTERN = re.compile(r'Step (\d+)')
+
+    def __init__(self, callback: Callable[[int], None]) -> None:
+        super().__init__(logging.INFO)
+        self.callback = callback
+        self.thread_id = threading.get_ident()
+        self.step = 0
+
+    def emit(self, record):
+        if record.thread != self.thread_id:
+            return
+        match = self.STEP_PATTERN.match(str(record.msg))
+        if not match:
+            return
+        step = int(match.group(1))
+        # layout step is logged for each page
+        if step == self.step:
+            return
+        self.step = step
+        try:
+            self.callback(step)
+        except Exception:
+            self.handleError(record)
+
+
+def parse_graph_url(url: str) -> Tuple[str, str, Dict[str, Any]]:
+    '''
+    Graph type, data key and params of `graph://lineplot/activity?width=7&height=3&legend`
+    '''
+    url_parsed = urlparse(url)
+    params = parse_qs(url_parsed.query, keep_blank_values=True)
+    for key, value in params.items():
+        params[key] = value[0] if len(value) == 1 else True
+    return url_parsed.hostname, url_parsed.path[1:], params
+
+
+def graph_key(graph_type: str, data_key: str, params: Dict[str, Any]) -> Tuple:
+    # WeasyPrint passes the url quoted, so graphs are matched by parsed parts
+    return graph_type, data_key, tuple(sorted(params.items()))
+
+
+def render_graph(graph_type: str, data, params: dict = {}, image_format: str = 'png') -> bytes:
+    '''
+    Render graph on its own `Figure`, safe to run in threads and processes
+    '''
+    colors = sbn.color_palette('pastel')
+    image_format = params.get('format', image_format)
+
+    if 'width' in params and 'height' in params:
+        figure = Figure(figsize=(int(params['width']), int(params['height'])))
+    else:
+        figure = Figure()
+    FigureCanvasAgg(figure)
+    ax = figure.subplots()
+    ax.set_prop_cycle(color=colors)
+
+    graph_fn = None
+    if graph_type == 'pie':
+        graph_fn = lambda data: ax.pie(data.get('data'), labels=data.get('labels'), colors=colors, labeldistance=None, **data.get('kwargs', {}))
+    if graph_type == 'plot':
+        graph_fn = lambda data: ax.plot(data.get('x'), data.get('y'), **data.get('kwargs', {}))
+    elif graph_type == 'lineplot':
+        graph_fn = lambda data: sbn.lineplot(x=data.get('x'), y=data.get('y'), ax=ax, **data.get('kwargs', {}))
+    if not graph_fn:
+        return None
+
+    if isinstance(data, list):
+        for line in data:
+            graph_fn(line)
+    else:
+        graph_fn(data)
+
+    if 'ylabel' in params:
+        ax.set_ylabel(params['ylabel'])
+    if 'xlabel' in params:
+        ax.set_xlabel(params['xlabel'])
+    if 'title' in params:
+        ax.set_title(params['title'])
+    if 'legend' in params:
+        ax.legend()
+    ax.tick_params(axis='x', labelsize=10, rotation=45)
+
+    figure.tight_layout()
+    buf = BytesIO()
+    figure.savefig(buf, format=image_format)
+    return buf.getvalue()
+
+
+graph_executor: Executor = None
+graph_executor_lock = threading.Lock()
+
+
+def get_graph_executor() -> Executor:
+    '''
+    Process pool shared by the reports of the process,
+    threads in daemonic processes (e.g. Celery worker) which can't have children
+    '''
+    global graph_executor
+    with graph_executor_lock:
+        if graph_executor is None:
+            if multiprocessing.current_process().daemon:
+                graph_executor = ThreadPoolExecutor(max_workers=settings.PDF_GRAPH_WORKERS)
+            else:
+                # not forked, the API process runs threads
+                graph_executor = ProcessPoolExecutor(
+                    max_workers=settings.PDF_GRAPH_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+        return graph_executor
+
+
 class PdfReport:
+    '''
+    Compiled template shared by the reports of the process (see `get_pdf_report`),
+    stylesheets with their font configuration per thread as it can't be shared by concurrent layouts.
+    The data is passed to `generate` only.
+    '''
+    PROGRESS_STEPS = REPORT_PROGRESS_STEPS
+
     def __init__(
         self,
         template_path: str,
         css_path: Union[str, List[str]] = None,
-        with_logging: bool = False
+        with_logging: bool = False,
+        graph_format: str = settings.PDF_GRAPH_FORMAT
     ) -> None:
-        self.font_config = FontConfiguration()
-        self.template = Template(filename=template_path)
-        self.stylesheets = None
-
-        self.data = None
-
-        if not css_path:
-            pass
-        elif isinstance(css_path, list):
-            self.stylesheets = []
-            for path in css_path:
-                if path:
-                    self.stylesheets.append(CSS(path))
+        self.graph_format = graph_format
+        self.template_path = template_path
+        if isinstance(css_path, list):
+            self.css_paths = [path for path in css_path if path]
         else:
-            self.stylesheets = [CSS(css_path)]
+            self.css_paths = [css_path] if css_path else []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.load()
 
         if with_logging:
             self.logging()
 
+    def files_mtime(self) -> Tuple[float, ...]:
+        return tuple(os.stat(path).st_mtime for path in [self.template_path, *self.css_paths])
+
+    def load(self) -> None:
+        # swapped at once, `generate` reads a consistent version
+        self.loaded = (self.files_mtime(), Template(filename=self.template_path))
+
+    def reload_if_changed(self) -> None:
+        if self.files_mtime() == self.loaded[0]:
+            return
+        with self.lock:
+            if self.files_mtime() != self.loaded[0]:
+                self.load()
+
+    def thread_styles(self, mtime: Tuple[float, ...]) -> Tuple[FontConfiguration, Optional[List[CSS]]]:
+        '''
+        Font configuration and stylesheets of the current thread for the files of `mtime`
+        '''
+        styles = getattr(self.local, 'styles', None)
+        if styles is None or styles[0] != mtime:
+            font_config = FontConfiguration()
+            stylesheets = [CSS(path, font_config=font_config) for path in self.css_paths] or None
+            styles = self.local.styles = (mtime, font_config, stylesheets)
+        return styles[1], styles[2]
+
     def logging(self):
-        # TODO use to generate progress one of 7 steps
         weayprint_logger.setLevel(logging.DEBUG)
         logger = logging.getLogger('weasyprint')
         logger.addFilter(LoggerFilter())
@@ -56,77 +220,96 @@ class PdfReport:
         logger.handlers = []
         logger.addHandler(logging.FileHandler('./weasyprint.log'))
 
-    def url_fetcher(self, url):
+    def url_fetcher(self, url, data: Dict = None, graphs: Dict[Tuple, bytes] = None):
         url_parsed = urlparse(url)
         if url_parsed.scheme == 'graph':
-            graph_type = url_parsed.hostname
-            data_key = url_parsed.path[1:]
-            params = parse_qs(url_parsed.query, keep_blank_values=True)
-
-            for key, value in params.items():
-                params[key] = value[0] if len(value) == 1 else True
+            graph_type, data_key, params = parse_graph_url(url)
+            image_format = params.get('format', self.graph_format)
+            graph = (graphs or {}).get(graph_key(graph_type, data_key, params))
+            if graph is None:
+                graph = self.generate_graph(graph_type, data[data_key], params)
 
             return dict(
-                file_obj=self.generate_graph(graph_type, self.data[data_key], params),
-                mime_type='image/png'
+                string=graph,
+                mime_type=GRAPH_MIME_TYPES.get(image_format, 'image/png')
             )
         return default_url_fetcher(url)
 
     def generate_graph(self, graph_type, data, params: dict = {}):
-        graph_fn = None
-        colors = sbn.color_palette('pastel')
-        sbn.set_palette('pastel')
-        if graph_type == 'pie':
-            graph_fn = lambda data: plt.pie(data.get('data'), labels=data.get('labels'), colors=colors, labeldistance=None, **data.get('kwargs', {}))
-        if graph_type == 'plot':
-            graph_fn = lambda data: plt.plot(data.get('x'), data.get('y'), colors=colors, **data.get('kwargs', {}))
-        elif graph_type == 'lineplot':
-            graph_fn = lambda data: sbn.lineplot(x=data.get('x'), y=data.get('y'), **data.get('kwargs', {}))
-        if not graph_fn:
-            return None
-
-        buf = BytesIO()
-
-        if 'width' in params and 'height' in params:
-            plt.figure(figsize=(int(params['width']), int(params['height'])))
-
-        if isinstance(data, list):
-            for line in data:
-                graph_fn(line)
-        else:
-            graph_fn(data)
-
-        if 'ylabel' in params:
-            plt.ylabel(params['ylabel'])
-        if 'xlabel' in params:
-            plt.xlabel(params['xlabel'])
-        if 'title' in params:
-            plt.title(params['title'])
-        if 'legend' in params:
-            plt.legend()
-        plt.tick_params(axis='x', labelsize=10, rotation=45)
-
-        plt.tight_layout()
-        plt.savefig(buf, format='png')
-        plt.close()
-        buf.seek(0)
-
-        return buf
-
-    def generate(self, data: Dict = None, file_name: str = 'report.pdf', as_return: bool = True):
-        self.data = data if data else {}
-        self.data['_file_name'] = file_name
-
-        html = HTML(
-            string=self.template.render(**self.data),
-            url_fetcher=self.url_fetcher
-        )
-
-        pdf_file = html.write_pdf(
-            target=file_name if not as_return else None,
-            stylesheets=self.stylesheets,
-            font_config=self.font_config,
-            optimize_size=('fonts', 'images')
-        )
+        return render_graph(graph_type, data, params, self.graph_format)
+
+    def prerender_graphs(self, html: str, data: Dict) -> Dict[Tuple, bytes]:
+        '''
+        Render concurrently all graphs referenced by `html` before the layout
+        '''
+        graphs = {}
+        for url in set(GRAPH_URL_PATTERN.findall(html)):
+            graph_type, data_key, params = parse_graph_url(unescape(url))
+            if data_key in data:
+                graphs[graph_key(graph_type, data_key, params)] = (graph_type, data[data_key], params)
+        if not graphs:
+            return {}
+
+        executor = get_graph_executor()
+        futures = {
+            key: executor.submit(render_graph, graph_type, graph_data, params, self.graph_format)
+            for key, (graph_type, graph_data, params) in graphs.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
 
+    def generate(
+        self,
+        data: Dict = None,
+        file_name: str = 'report.pdf',
+        as_return: bool = True,
+        progress: Callable[[int], None] = None
+    ):
+        data = {**(data or {}), '_file_name': file_name}
+        # consistent set in case of reload meanwhile
+        mtime, template = self.loaded
+        font_config, stylesheets = self.thread_styles(mtime)
+
+        progress_handler = None
+        if progress:
+            progress_handler = ProgressHandler(progress)
+            progress_logger.setLevel(logging.INFO)
+            progress_logger.addHandler(progress_handler)
+
+        try:
+            html_string = template.render(**data)
+            graphs = self.prerender_graphs(html_string, data)
+            html = HTML(
+                string=html_string,
+                url_fetcher=lambda url: self.url_fetcher(url, data, graphs)
+            )
+
+            pdf_file = html.write_pdf(
+                target=file_name if not as_return else None,
+                stylesheets=stylesheets,
+                font_config=font_config,
+                optimize_size=('fonts', 'images')
+            )
+        finally:
+            if progress_handler:
+                progress_logger.removeHandler(progress_handler)
+
+        if progress:
+            progress(self.PROGRESS_STEPS)
         return pdf_file
+
+
+pdf_reports: Dict[Tuple, PdfReport] = {}
+pdf_reports_lock = threading.Lock()
+
+
+def get_pdf_report(template_path: str, css_path: Union[str, List[str]] = None) -> PdfReport:
+    '''
+    Report compiled once per process, reloaded when the files change
+    '''
+    key = (template_path, tuple(css_path) if isinstance(css_path, list) else css_path)
+    with pdf_reports_lock:
+        pdf_report = pdf_reports.get(key)
+        if pdf_report is None:
+            pdf_report = pdf_reports[key] = PdfReport(template_path=template_path, css_path=css_path)
+    pdf_report.reload_if_changed()
+    return pdf_report
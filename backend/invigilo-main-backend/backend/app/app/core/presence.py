@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceTracker:
+    '''
+    Liveness of cameras reported by the bridges.
+
+    The heartbeats of a bridge may reach any worker, so the state is read from database:
+    `last_seen` of the server is written at most every `refresh_interval` and the cameras only when their state flips.
+    Servers without heartbeat within `ttl` and their cameras are marked offline by `expire` of any worker.
+    '''
+
+    def __init__(
+        self, ttl: int = settings.CAMERA_PRESENCE_TTL,
+        refresh_interval: int = settings.CAMERA_PRESENCE_SWEEP_INTERVAL
+    ) -> None:
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+
+    def heartbeat(self, db: Session, cam_server_id: int, statuses: Dict[int, bool]) -> Dict[int, bool]:
+        '''
+        Register heartbeat of the server with the liveness of its cameras,
+        returns the cameras which changed the state
+        '''
+        now = datetime.utcnow()
+        crud.cam_server.update_seen(
+            db, id=cam_server_id, seen_at=now,
+            refresh_before=now - timedelta(seconds=self.refresh_interval)
+        )
+        # cameras may have been marked offline by another worker
+        known = crud.camera.get_status_by_cam_server(db, cam_server_id)
+
+        changes = {
+            camera_id: is_live for camera_id, is_live in statuses.items()
+            if camera_id in known and known[camera_id] != is_live
+        }
+        for is_live in (True, False):
+            ids = [camera_id for camera_id, value in changes.items() if value == is_live]
+            if ids:
+                crud.camera.update_status_multi(db, ids=ids, is_live=is_live)
+
+        return changes
+
+    def expire(self, db: Session) -> List[int]:
+        '''
+        Mark offline the cameras of servers without heartbeat within `ttl`
+        '''
+        expired = crud.cam_server.expire_live(db, seen_before=datetime.utcnow() - timedelta(seconds=self.ttl))
+        for cam_server_id in expired:
+            crud.camera.update_status_multi(db, cam_server_id=cam_server_id, is_live=False)
+
+        return expired
+
+    def expire_with_session(self) -> List[int]:
+        db = SessionLocal()
+        try:
+            return self.expire(db)
+        finally:
+            db.close()
+
+    async def run(self, interval: int = settings.CAMERA_PRESENCE_SWEEP_INTERVAL) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                expired = await run_in_threadpool(self.expire_with_session)
+                if expired:
+                    logger.info(f"Servers went offline {expired}")
+            except Exception as e:
+                logger.error(e)
+
+
+presence_tracker = PresenceTracker()
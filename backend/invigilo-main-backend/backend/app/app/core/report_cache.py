@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Any, Callable
+
+from app.core.cache import CacheBackend, MemoryCacheBackend, load_cache_backend
+from app.core.config import settings
+
+
+class ReportCache:
+    '''
+    Results of report data functions by `(kind, company, range, interval)`.
+
+    A range is closed when it ended before incidents in it can still be flagged
+    (`NOTIFICATION_TIME_WINDOW`), closed ranges are cached until evicted.
+    Open ranges expire after `open_ttl` or on the next incident write of the company.
+    Invalidation bumps per company generations which are part of the key,
+    so it works the same with a backend shared between workers.
+    '''
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        open_ttl: int = settings.REPORT_CACHE_OPEN_TTL,
+        settle_interval: int = settings.NOTIFICATION_TIME_WINDOW
+    ) -> None:
+        self.backend = backend
+        self.open_ttl = open_ttl
+        self.settle_interval = timedelta(seconds=settle_interval)
+
+    def generation(self, company_id: int, scope: str) -> int:
+        return self.backend.get(f'report:generation:{scope}:{company_id}') or 0
+
+    def is_closed(self, filters) -> bool:
+        if not filters or not filters.end:
+            return False
+        # last bucket of a timeline may end after `filters.end`
+        end = filters.end.replace(tzinfo=None)
+        if filters.interval:
+            end += filters.interval
+        return end <= datetime.utcnow() - self.settle_interval
+
+    def key(self, kind: str, company_id: int, filters) -> str:
+        scope = 'closed' if self.is_closed(filters) else 'open'
+        parts = ['report', kind, str(company_id)]
+        if filters:
+            start = filters.start.replace(tzinfo=None, microsecond=0)
+            end = filters.end.replace(tzinfo=None, microsecond=0) if filters.end else None
+            interval = int(filters.interval.total_seconds()) if filters.interval else None
+            parts += [start.isoformat(), end.isoformat() if end else '', str(interval or '')]
+        parts += [scope, str(self.generation(company_id, scope))]
+        return ':'.join(parts)
+
+    def get_or_set(self, kind: str, company_id: int, filters, fn: Callable[[], Any]) -> Any:
+        key = self.key(kind, company_id, filters)
+        value = self.backend.get(key)
+        if value is None:
+            value = fn()
+            ttl = None if self.is_closed(filters) else self.open_ttl
+            self.backend.set(key, value, ttl=ttl)
+        return value
+
+    def invalidate(self, company_id: int, created_at: datetime = None) -> None:
+        '''
+        Drop cached reports of the company affected by incident created at `created_at`
+        '''
+        self.backend.incr(f'report:generation:open:{company_id}')
+        if not created_at or created_at.replace(tzinfo=None) < datetime.utcnow() - self.settle_interval:
+            self.backend.incr(f'report:generation:closed:{company_id}')
+
+    def cached(self, kind: str):
+        '''
+        Decorator of report data functions with `(db, filters, company_id)` or `(db, company_id)` arguments
+        '''
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(db, *args):
+                *filters, company_id = args
+                return self.get_or_set(
+                    kind, company_id, filters[0] if filters else None,
+                    lambda: fn(db, *args)
+                )
+            return wrapper
+        return decorator
+
+
+if settings.REPORT_CACHE_BACKEND:
+    report_cache = ReportCache(load_cache_backend(settings.REPORT_CACHE_BACKEND))
+else:
+    report_cache = ReportCache(MemoryCacheBackend(max_entries=settings.REPORT_CACHE_MAX_ENTRIES))
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from time import monotonic, time
+from typing import Optional
+
+from app import crud
+from app.core.config import settings
+
+thumbnail_executor = ThreadPoolExecutor(max_workers=settings.REPORT_THUMBNAIL_WORKERS)
+sweep_lock = threading.Lock()
+swept_at: Optional[float] = None
+
+
+def thumbnail_path(object_key: str) -> Path:
+    name = hashlib.sha1(object_key.encode()).hexdigest()
+    return Path(settings.REPORT_THUMBNAIL_CACHE_DIR) / f'{name}.jpg'
+
+
+def fetch_thumbnail(object_key: str) -> Optional[str]:
+    '''
+    Frame downscaled to `REPORT_THUMBNAIL_SIZE` and cached on local disk, returns `file://` url
+    '''
+    path = thumbnail_path(object_key)
+    try:
+        # mtime is the last use, see `sweep_thumbnails`
+        os.utime(path)
+        return path.as_uri()
+    except FileNotFoundError:
+        pass
+
+    data = crud.upload.get_object(object_key)
+    if not data:
+        return None
+    from PIL import Image
+
+    try:
+        image = Image.open(BytesIO(data))
+        image.thumbnail((settings.REPORT_THUMBNAIL_SIZE, settings.REPORT_THUMBNAIL_SIZE))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # written aside and moved, concurrent reports may fetch the same frame
+        temp_path = path.with_name(f'{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp')
+        image.convert('RGB').save(temp_path, format='JPEG', quality=80)
+        os.replace(temp_path, path)
+    except Exception as e:
+        # TODO consider other exceptions
+        print("ERROR:fetch_thumbnail:", e)
+        return None
+    schedule_sweep()
+    return path.as_uri()
+
+
+def sweep_thumbnails(
+    max_age: int = settings.REPORT_THUMBNAIL_CACHE_TTL,
+    max_size: int = settings.REPORT_THUMBNAIL_CACHE_MAX_SIZE
+) -> int:
+    '''
+    Remove thumbnails not used within `max_age`, then the least recently used over `max_size` bytes
+    '''
+    directory = Path(settings.REPORT_THUMBNAIL_CACHE_DIR)
+    if not directory.exists():
+        return 0
+    expires = time() - max_age
+    removed = 0
+    thumbnails = []
+    for path in directory.iterdir():
+        try:
+            stat = path.stat()
+            if stat.st_mtime < expires:
+                # with temporary files left by failed writes
+                path.unlink()
+                removed += 1
+            elif path.suffix == '.jpg':
+                thumbnails.append((stat.st_mtime, stat.st_size, path))
+        except FileNotFoundError:
+            continue
+
+    size = sum(file_size for _, file_size, _ in thumbnails)
+    for _, file_size, path in sorted(thumbnails):
+        if size <= max_size:
+            break
+        path.unlink(missing_ok=True)
+        size -= file_size
+        removed += 1
+    return removed
+
+
+def schedule_sweep() -> None:
+    # the cache is on local disk of each worker, swept by the worker at most every `REPORT_THUMBNAIL_SWEEP_INTERVAL`
+    global swept_at
+    with sweep_lock:
+        if swept_at is not None and monotonic() - swept_at < settings.REPORT_THUMBNAIL_SWEEP_INTERVAL:
+            return
+        swept_at = monotonic()
+    thumbnail_executor.submit(sweep_thumbnails)
+
+
+def submit_thumbnail(object_key: str) -> Future:
+    return thumbnail_executor.submit(fetch_thumbnail, object_key)
@@ -0,0 +1,447 @@
+from calendar import monthrange
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from math import exp, log
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+from app import crud, schemas
+from app.core.config import settings
+from app.core.report_cache import report_cache
+from app.core.report_thumbnails import submit_thumbnail
+from app.models import Incident, Report_Job
+from app.schemas.report_job import ReportJobCreate, ReportJobStatus
+from app.schemas.report import (
+    CamServerActivity, ReportCamServerActivityTimeline, ReportGaugeTendency, ReportInterventionFilters,
+    ReportServerMeter, ReportServerTypeCount, ReportType, TypeCount
+)
+
+
+def report_buckets(start: datetime, end: datetime, interval: timedelta) -> List[datetime]:
+    """
+    Start of each `interval` from `start` to `end`, same as `generate_series`
+    """
+    if interval.total_seconds() <= 0:
+        raise HTTPException(status_code=400, detail="Interval should be positive")
+    buckets = []
+    bucket = start
+    while bucket <= end:
+        buckets.append(bucket)
+        bucket += interval
+    return buckets
+
+
+def bucket_counts_data(db: Session, filters, company_id: int):
+    """
+    Buckets of the report and incidents count by `(cam_server_id, bucket)`
+    """
+    start = filters.start.replace(tzinfo=None, microsecond=0)
+    end = filters.end.replace(tzinfo=None, microsecond=0)
+    buckets = report_buckets(start, end, filters.interval)
+
+    rows = crud.incident_rollup.get_counts(
+        db,
+        company_id=company_id,
+        start=start,
+        end=buckets[-1] + filters.interval if buckets else start,
+        interval=filters.interval
+    )
+    counts = {(row.cam_server_id, row.x_from): row.i_count for row in rows}
+    return buckets, counts
+
+
+@report_cache.cached('activity')
+def activity_timeline_data(db: Session, filters, company_id: int):
+
+    servers = crud.cam_server.get_multi(db, filters={'company_id': company_id})
+    buckets, counts = bucket_counts_data(db, filters, company_id)
+
+    now = datetime.now()
+    response = []
+    for server in servers:
+        timeline = []
+        for x_from in buckets:
+            i_count = counts.get((server.id, x_from))
+            if i_count:
+                y = i_count
+            elif x_from > now:
+                y = None
+            else:
+                y = 0
+            timeline.append(CamServerActivity(x=x_from, y=y))
+
+        response.append(ReportCamServerActivityTimeline(
+            cam_server=server,
+            interval=filters.interval,
+            timeline=timeline
+        ))
+
+    return response
+
+
+def server_counts_data(db: Session, filters, company_id: int, by_type: bool = False):
+    """
+    Incidents count by `cam_server_id` (and `type_index` when `by_type`) from `filters.start` until `filters.end` inclusive
+    """
+    start = filters.start.replace(tzinfo=None, microsecond=0)
+    end = filters.end.replace(tzinfo=None, microsecond=0)
+    return crud.incident_rollup.get_counts(
+        db,
+        company_id=company_id,
+        start=start,
+        end=end + timedelta(microseconds=1),
+        by_type=by_type
+    )
+
+
+@report_cache.cached('count')
+def pie_count_data(db: Session, filters, company_id: int):
+    servers = crud.cam_server.get_multi(db, filters={'company_id': company_id})
+    counts = {
+        row.cam_server_id: row.i_count
+        for row in server_counts_data(db, filters, company_id)
+    }
+
+    return [
+        ReportServerMeter(cam_server=server, value=counts.get(server.id, 0))
+        for server in servers
+    ]
+
+
+@report_cache.cached('by_type')
+def by_type_count_data(db: Session, filters, company_id: int):
+    servers = crud.cam_server.get_multi(db, filters={'company_id': company_id})
+    server_values = {}
+    for row in server_counts_data(db, filters, company_id, by_type=True):
+        server_values.setdefault(row.cam_server_id, []).append(
+            TypeCount(index=row.type_index, count=row.i_count)
+        )
+
+    return [
+        ReportServerTypeCount(cam_server=server, values=server_values.get(server.id, []))
+        for server in servers
+    ]
+
+
+@report_cache.cached('tendency')
+def gauge_tendency_data(db: Session, filters, company_id: int):
+    servers = crud.cam_server.get_multi(db, filters={'company_id': company_id})
+    _, counts = bucket_counts_data(db, filters, company_id)
+
+    # only buckets with incidents, same as `avg` and `max` skip empty buckets
+    server_counts = {}
+    for (cam_server_id, _), i_count in counts.items():
+        if i_count:
+            server_counts.setdefault(cam_server_id, []).append(i_count)
+
+    response = []
+    for server in servers:
+        values = server_counts.get(server.id)
+        if values:
+            value = (sum(values) / len(values) / max(values)) * 100
+        else:
+            value = 100
+
+        response.append(ReportGaugeTendency(
+            cam_server=server,
+            interval=filters.interval,
+            created=filters.start,
+            value=value
+        ))
+
+    return response
+
+
+@report_cache.cached('gauge')
+def gauge_meter_data(db: Session, company_id: int):
+    servers = crud.cam_server.get_multi(db, filters={'company_id': company_id})
+
+    intervals = [
+        settings.GAUGE_ALPHA_INTERVAL,
+        settings.GAUGE_BETA_INTERVAL,
+        settings.GAUGE_GAMMA_INTERVAL,
+        settings.GAUGE_SIGMA_INTERVAL,
+    ]
+    coefficients = [
+        settings.GAUGE_ALPHA_COEFFICIENT,
+        settings.GAUGE_BETA_COEFFICIENT,
+        settings.GAUGE_GAMMA_COEFFICIENT,
+        settings.GAUGE_SIGMA_COEFFICIENT,
+    ]
+    end_timestamp = datetime.utcnow()
+    sql_params = {
+        'company_id': company_id,
+        'start': end_timestamp - timedelta(seconds=max(intervals)),
+        'alpha_start': end_timestamp - timedelta(seconds=settings.GAUGE_ALPHA_INTERVAL),
+        'beta_start': end_timestamp - timedelta(seconds=settings.GAUGE_BETA_INTERVAL),
+        'gamma_start': end_timestamp - timedelta(seconds=settings.GAUGE_GAMMA_INTERVAL),
+        'sigma_start': end_timestamp - timedelta(seconds=settings.GAUGE_SIGMA_INTERVAL),
+    }
+
+    sql = '''
+select
+	camera.cam_server_id,
+	count(incident.id) filter (where incident.created_at >= :alpha_start) as alpha_count,
+	count(incident.id) filter (where incident.created_at >= :beta_start) as beta_count,
+	count(incident.id) filter (where incident.created_at >= :gamma_start) as gamma_count,
+	count(incident.id) filter (where incident.created_at >= :sigma_start) as sigma_count
+from
+	incident
+join camera on
+	camera.id = incident.camera_id
+join cam_server on
+	cam_server.id = camera.cam_server_id
+where
+	incident.deleted = false
+	and incident.inaccurate = false
+	and cam_server.company_id = :company_id
+	and incident.created_at >= :start
+group by
+	camera.cam_server_id
+'''
+    result = db.execute(text(sql), sql_params)
+    counts = {
+        row.cam_server_id: (row.alpha_count, row.beta_count, row.gamma_count, row.sigma_count)
+        for row in result
+    }
+    if not servers:
+        return []
+
+    ln = log(1/100)
+    values = []
+    for server in servers:
+        # alpha, beta, gamma, sigma counts of the server
+        server_counts = counts.get(server.id, (0, 0, 0, 0))
+        values.append(sum(
+            exp(-(count / 10) - ln) * coefficient
+            for count, coefficient in zip(server_counts, coefficients)
+        ))
+
+    return [
+        ReportServerMeter(cam_server=server, value=round(value, 4))
+        for server, value in zip(servers, values)
+    ]
+
+
+def resolve_report_filters(filters: ReportInterventionFilters) -> ReportInterventionFilters:
+    """
+    Set `start` and `end` from the `period` or from `created_at_from` and `created_at_to` for custom period
+    """
+    a_second = timedelta(seconds=1)
+
+    if filters.period and filters.period != ReportType.CUSTOM:
+        # TODO parse from string or integer
+        start = filters.start
+        if filters.created_at_from:
+            start = filters.created_at_from
+        start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        if filters.period == ReportType.DAY:
+            period = timedelta(days=1)
+        elif filters.period == ReportType.WEEK:
+            start = start - timedelta(days=start.weekday())
+            period = timedelta(weeks=1)
+        else:  # elif filters.period == ReportType.MONTH:
+            start = start.replace(day=1)
+            period = timedelta(days=monthrange(start.year, start.month)[1])
+
+        filters.start = start
+        filters.end = start + period - a_second
+    else:
+        if not filters.created_at_from:
+            filters.created_at_from = (
+                datetime.now()
+                .replace(hour=0, minute=0, second=0, microsecond=0)
+            )
+        if not filters.created_at_to:
+            filters.created_at_to = datetime.now()
+            # TODO max 1 month period
+
+        filters.start = filters.created_at_from
+        filters.end = filters.created_at_to
+
+    filters.created_at_from = filters.start
+    filters.created_at_to = filters.end
+    return filters
+
+
+def report_incidents(
+    db: Session,
+    filters: ReportInterventionFilters,
+    company_id: int,
+    limit: int
+) -> Tuple[List[SimpleNamespace], Dict[str, Future]]:
+    """
+    Incidents of the report fetched in batches, with thumbnails of frames queued by `frame`
+    """
+    columns = [
+        Incident.uuid, Incident.type, Incident.created_at,
+        Incident.location, Incident.count, Incident.frame
+    ]
+    incidents = []
+    thumbnails = {}
+    for batch in crud.incident.get_batches_by_filters(
+        db, filters, company_id,
+        entities=columns,
+        batch_size=settings.REPORT_INCIDENTS_BATCH_SIZE,
+        limit=limit
+    ):
+        for row in batch:
+            if row.frame and row.frame not in thumbnails:
+                thumbnails[row.frame] = submit_thumbnail(row.frame)
+            incidents.append(SimpleNamespace(**row._asdict(), frame_url=None))
+    return incidents, thumbnails
+
+
+def report_pdf_data(db: Session, filters: ReportInterventionFilters, company_id: int) -> Dict[str, Any]:
+    """
+    Data of `report.mako` template, `filters` should be resolved by `resolve_report_filters`
+    """
+    company = crud.company.get(db, company_id)
+    created = datetime.now()
+
+    if company:
+        company = schemas.Company(**jsonable_encoder(company))
+
+    if filters.camera__cam_server_id:
+        server = crud.cam_server.get(db, filters.camera__cam_server_id)
+    else:
+        server = None
+    ai_type_names = {
+        ai_type.index: ai_type.name
+        for ai_type in crud.ai_type.get_multi(db) if ai_type.name
+    }
+
+    def type_names(types):
+        return [ai_type_names[int(t_index)] for t_index in types if int(t_index) in ai_type_names]
+
+    incidents_total = crud.incident.get_count_by_filters(db, filters, company_id)
+    summarized = filters.end - filters.start > timedelta(seconds=settings.REPORT_INCIDENTS_SUMMARY_INTERVAL)
+    summary = None
+    if summarized:
+        summary = [
+            SimpleNamespace(location=row.location, type=row.type, count=row.i_count)
+            for row in crud.incident.get_summary_by_filters(db, filters, company_id)
+        ]
+    incidents, thumbnails = report_incidents(
+        db, filters, company_id,
+        settings.REPORT_INCIDENTS_SUMMARY_MAX if summarized else settings.REPORT_INCIDENTS_MAX
+    )
+
+    activity = []
+    for line in activity_timeline_data(db, filters, company_id):
+        activity.append({
+            'kwargs': {
+                'label': line.cam_server.location,
+            },
+            'x': [d.x for d in line.timeline],
+            'y': [d.y for d in line.timeline]
+        })
+
+    pie = {'data': [], 'labels': []}
+    for line in pie_count_data(db, filters, company_id):
+        pie['labels'].append(line.cam_server.location)
+        pie['data'].append(line.value)
+
+    # thumbnails are fetched meanwhile the rest of the data
+    for incident in incidents:
+        incident.frame_url = thumbnails[incident.frame].result() if incident.frame else None
+
+    return {
+        'created': created,
+        'company': company,
+        'server': server,
+        'filters': filters,
+        'type_names': type_names,
+        'incidents': incidents,
+        'incidents_total': incidents_total,
+        'incidents_summary': summary,
+        'activity': activity,
+        'pie_location': pie
+    }
+
+
+def build_report_pdf(
+    db: Session,
+    filters: ReportInterventionFilters,
+    company_id: int,
+    progress: Callable[[int], None] = None
+) -> Tuple[str, bytes]:
+    """
+    Render the report PDF, returns file name and content.
+    `progress` is called with each of `PdfReport.PROGRESS_STEPS` steps of the layout.
+    """
+    # rendering libraries are loaded by the first report
+    from app.core.pdf_report import get_pdf_report
+
+    filters = resolve_report_filters(filters)
+    data = report_pdf_data(db, filters, company_id)
+
+    pdf = get_pdf_report(
+        template_path=str(Path('./pdf-templates') / "report.mako"),
+        css_path=str(Path('./pdf-templates') / "report.css")
+    )
+
+    file_name = f'report_{data["created"].strftime("%Y-%m-%d")}.pdf'
+    return file_name, pdf.generate(data, file_name, progress=progress)
+
+
+def closed_periods(now: datetime) -> List[Tuple[str, datetime]]:
+    """
+    Periods of `REPORT_SCHEDULE_PERIODS` which ended at the start of the day of `now`
+    """
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    periods = [(ReportType.DAY, today - timedelta(days=1))]
+    if today.weekday() == 0:
+        periods.append((ReportType.WEEK, today - timedelta(weeks=1)))
+    if today.day == 1:
+        periods.append((ReportType.MONTH, (today - timedelta(days=1)).replace(day=1)))
+    return [
+        (period.value, start) for period, start in periods
+        if period.value in settings.REPORT_SCHEDULE_PERIODS
+    ]
+
+
+def schedule_period_reports(db: Session, now: datetime = None) -> List[Report_Job]:
+    """
+    Jobs of the reports for each company of the periods just closed, skips already scheduled unless failed
+    """
+    periods = closed_periods(now or datetime.utcnow())
+    jobs = []
+    for company in crud.company.get_multi(db):
+        for period, start in periods:
+            scheduled = crud.report_job.get_scheduled(db, company_id=company.id, period=period, start=start)
+            if scheduled and scheduled.status != ReportJobStatus.FAILED:
+                continue
+            filters = resolve_report_filters(ReportInterventionFilters(period=period, start=start))
+            jobs.append(crud.report_job.create(db, obj_in=ReportJobCreate(
+                company_id=company.id,
+                period=period,
+                start=filters.start,
+                end=filters.end,
+                filters=jsonable_encoder(filters.dict(exclude_none=True))
+            )))
+    return jobs
+
+
+def get_scheduled_report(db: Session, filters: ReportInterventionFilters, company_id: int) -> Optional[Report_Job]:
+    """
+    Generated report of the period when nothing else than the period is requested
+    """
+    if not company_id or not filters.period or filters.period == ReportType.CUSTOM:
+        return None
+    if set(filters.dict(exclude_defaults=True)) - {'start', 'period', 'created_at_from'}:
+        return None
+    filters = resolve_report_filters(filters.copy())
+    return crud.report_job.get_scheduled(
+        db,
+        company_id=company_id,
+        period=filters.period,
+        start=filters.start,
+        status=ReportJobStatus.DONE
+    )
@@ -0,0 +1,101 @@
+import base64
+import zlib
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import msgpack
+import orjson
+
+from app.schemas.stream import StreamCompression, StreamEncoding, StreamFormat
+
+DEFAULT_ENCODING = StreamEncoding()
+
+
+def msgpack_default(value: Any) -> Any:
+    # same representation as orjson
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def escape_pointer(key: Any) -> str:
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def json_patch(old: Any, new: Any, path: str = '') -> List[Dict[str, Any]]:
+    '''
+    RFC 6902 operations changing `old` to `new`, lists of different length are replaced
+    '''
+    if isinstance(old, dict) and isinstance(new, dict):
+        operations = []
+        for key, value in old.items():
+            if key not in new:
+                operations.append({'op': 'remove', 'path': f'{path}/{escape_pointer(key)}'})
+            else:
+                operations.extend(json_patch(value, new[key], f'{path}/{escape_pointer(key)}'))
+        for key, value in new.items():
+            if key not in old:
+                operations.append({'op': 'add', 'path': f'{path}/{escape_pointer(key)}', 'value': value})
+        return operations
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        operations = []
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            operations.extend(json_patch(old_item, new_item, f'{path}/{i}'))
+        return operations
+    if old == new:
+        return []
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+
+class StreamEvent:
+    '''
+    Event of a stream shared by all its connections, each encoding is computed once.
+
+    With `previous` records (id -> record sent before) `updated` records can be sent as
+    `{"id": id, "patch": [operations]}`, events without it (snapshot, replay) are sent whole.
+    '''
+
+    def __init__(self, response: Dict[str, List], previous: Dict[int, Dict[str, Any]] = None) -> None:
+        self.response = response
+        self.previous = previous
+        self.encoded: Dict[Tuple, bytes] = {}
+
+    def payload(self, patch: bool = False) -> Dict[str, List]:
+        if not (patch and self.previous and self.response.get("updated")):
+            return self.response
+        return {
+            **self.response,
+            "updated": [
+                {"id": record["id"], "patch": json_patch(self.previous[record["id"]], record)}
+                if record["id"] in self.previous else record
+                for record in self.response["updated"]
+            ]
+        }
+
+    def encode(self, encoding: StreamEncoding = DEFAULT_ENCODING) -> bytes:
+        key = (encoding.patch, encoding.format, encoding.compression)
+        if key not in self.encoded:
+            payload = self.payload(encoding.patch)
+            if encoding.format == StreamFormat.MSGPACK:
+                data = msgpack.packb(payload, default=msgpack_default)
+            else:
+                data = orjson.dumps(payload)
+            if encoding.compression == StreamCompression.ZLIB:
+                data = zlib.compress(data)
+            self.encoded[key] = data
+        return self.encoded[key]
+
+    def text(self, encoding: StreamEncoding = DEFAULT_ENCODING) -> str:
+        '''
+        Event as text of SSE `data`, binary encodings in base64
+        '''
+        data = self.encode(encoding)
+        if is_binary(encoding):
+            return base64.b64encode(data).decode("ascii")
+        return data.decode("utf-8")
+
+
+def is_binary(encoding: Optional[StreamEncoding]) -> bool:
+    return bool(encoding) and (
+        encoding.format != StreamFormat.JSON or encoding.compression != StreamCompression.NONE
+    )
@@ -0,0 +1,480 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.core.change_feed import change_feed
+from app.core.config import settings
+from app.core.stream_encoding import StreamEvent
+from app.db.session import SessionLocal
+from app.schemas.core import QueryParams
+
+logger = logging.getLogger(__name__)
+
+STREAM_PARAMS = QueryParams(
+    skip=0,
+    limit=10000
+)
+
+
+def jitter(delay: float) -> float:
+    # streams started together (e.g. reconnection of many bridges) don't poll together
+    return delay * random.uniform(1 - settings.STREAM_DELAY_JITTER, 1 + settings.STREAM_DELAY_JITTER)
+
+
+class StreamSubscriber:
+    '''
+    Queue of `(revision, event)` of one connection, `None` closes the connection.
+    With `revision` the connection resumes by replay of the changes since the revision instead of snapshot.
+    '''
+
+    def __init__(self, revision: int = None, max_size: int = settings.STREAM_QUEUE_SIZE) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.revision = revision
+
+    def put(self, data: Optional[Tuple[int, StreamEvent]]) -> bool:
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close(self) -> None:
+        # drop the backlog, the client reconnects and starts from a snapshot
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class Stream:
+    '''
+    One producer pulling the records by `pull_fn` and broadcasting
+    `new`, `updated` and `removed` records to all subscribers.
+    The first of `tables` is the table of the records, events are tagged by revision of `change_log`.
+
+    Without change feed the delay between polls starts at `stream_delay`,
+    doubles while nothing changes up to `STREAM_MAX_DELAY` and is back to `stream_delay` after a change.
+    '''
+
+    def __init__(
+        self, hub: 'StreamHub', key: Tuple,
+        pull_fn: Callable, show_fields: List[str] = None,
+        stream_delay: int = 10, exclude_events: List[str] = None,
+        tables: List[str] = None,
+        kwargs: Dict[str, Any] = None,
+    ) -> None:
+        self.hub = hub
+        self.key = key
+        self.pull_fn = pull_fn
+        self.show_fields = show_fields
+        self.stream_delay = stream_delay
+        self.exclude_events = exclude_events or []
+        self.tables = tables
+        self.kwargs = kwargs or {}
+        self.subscribers: Set[StreamSubscriber] = set()
+        # id -> current record, in order of the pull
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self.revision = 0
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.delay = stream_delay
+        self.polls = 0
+        self.poll_seconds = 0.0
+
+    def response_filter(self, response: Dict[str, List]) -> Dict[str, List]:
+        return {event: value for event, value in response.items() if event not in self.exclude_events}
+
+    def snapshot(self) -> StreamEvent:
+        return StreamEvent(self.response_filter({
+            "new": list(self.records.values()),
+            "updated": [],
+            "removed": []
+        }))
+
+    def subscribe(self, revision: int = None) -> StreamSubscriber:
+        subscriber = StreamSubscriber(revision)
+        if self.ready.is_set() and revision is None:
+            subscriber.put((self.revision, self.snapshot()))
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def broadcast(self, data: Tuple[int, StreamEvent]) -> None:
+        for subscriber in list(self.subscribers):
+            if not subscriber.put(data):
+                logger.warning(f"Evicting slow subscriber of stream {self.key}")
+                self.hub.evictions += 1
+                self.evict(subscriber)
+
+    def evict(self, subscriber: StreamSubscriber) -> None:
+        subscriber.close()
+        self.hub.unsubscribe(self, subscriber)
+
+    def close(self) -> None:
+        for subscriber in list(self.subscribers):
+            subscriber.close()
+        self.subscribers.clear()
+
+    def apply_changes(
+        self, changed: List[Tuple[int, Optional[Dict[str, Any]]]], existing_ids: Set[int] = None
+    ) -> Tuple[Dict[str, List], Dict[int, Dict[str, Any]]]:
+        """
+        Update the records by the changes, returns the changes different from the records
+        and the previous state of the updated records
+        """
+        previous = {}
+        response = {
+            "new": [],
+            "updated": [],
+            "removed": []
+        }
+        if existing_ids is not None:
+            response["removed"] = [id for id in self.records if id not in existing_ids]
+        for id, record in changed:
+            if record is None:
+                if id in self.records:
+                    response["removed"].append(id)
+            elif id not in self.records:
+                response["new"].append(record)
+            elif self.records[id] != record:
+                response["updated"].append(record)
+                previous[id] = self.records[id]
+            else:
+                continue
+            if record is not None:
+                self.records[id] = record
+        for id in response["removed"]:
+            self.records.pop(id, None)
+        return response, previous
+
+    def to_dict(self, detector: Any) -> Dict[str, Any]:
+        # `to_dict` rewrites the items of `show`
+        return detector.to_dict(show=list(self.show_fields or ()))
+
+    def pull(self, db, **kwargs) -> Any:
+        return self.pull_fn(db=db, **self.kwargs, **kwargs)
+
+    def get_revision(self, db) -> int:
+        return crud.change_log.get_revision(
+            db, tables=self.tables, cam_server_id=self.kwargs.get('cam_server_id')
+        )
+
+    def pull_snapshot(self, time_cursor: datetime) -> Tuple[int, Dict[int, Dict[str, Any]]]:
+        db = SessionLocal()
+        try:
+            revision = self.get_revision(db)
+            detectors = self.pull(db, params=STREAM_PARAMS, updated_before=time_cursor)
+            return revision, {d.id: self.to_dict(d) for d in detectors}
+        finally:
+            db.close()
+
+    def pull_changes(
+        self, revision: int, time_cursor: datetime, reconcile: bool = False, notified: bool = True
+    ) -> Tuple[int, Optional[List[Tuple[int, Optional[Dict[str, Any]]]]], Optional[Set[int]]]:
+        """
+        Revision, records changed after `time_cursor` (`None` for deleted) and,
+        on reconciliation, ids of all existing records.
+        Without notification of change nothing is pulled (`None`) while the revision of the stream is the same,
+        after a notification the records are pulled anyway: ids of `change_log` are taken on insert
+        and a change with lower id can be committed after the revision was read.
+        Pulled with short-lived session so the connection is back in the pool between polls.
+        """
+        db = SessionLocal()
+        try:
+            current_revision = self.get_revision(db)
+            if current_revision == revision and not (reconcile or notified):
+                return current_revision, None, None
+            if not reconcile and len(self.tables or ()) > 1:
+                # records depend on the rows of other tables
+                reconcile = crud.change_log.has_changes(
+                    db,
+                    revision=revision,
+                    tables=self.tables[1:],
+                    cam_server_id=self.kwargs.get('cam_server_id'),
+                    created_after=time_cursor
+                )
+
+            if reconcile:
+                detectors = self.pull(db, params=STREAM_PARAMS)
+                changed = [(d.id, self.to_dict(d)) for d in detectors]
+                return current_revision, changed, {d.id for d in detectors}
+
+            detectors = self.pull(db, params=STREAM_PARAMS, updated_after=time_cursor, include_deleted=True)
+            changed = [(d.id, None if d.deleted else self.to_dict(d)) for d in detectors]
+            return current_revision, changed, None
+        finally:
+            db.close()
+
+    def pull_log(self, revision: int, until: int) -> Optional[List[Any]]:
+        """
+        Changes of the stream after `revision`, `None` when the log doesn't have them anymore
+        """
+        db = SessionLocal()
+        try:
+            if crud.change_log.is_truncated(db, revision):
+                return None
+            return crud.change_log.get_since(
+                db,
+                revision=revision,
+                until=until,
+                tables=self.tables,
+                cam_server_id=self.kwargs.get('cam_server_id'),
+                overlap=settings.CHANGE_LOG_REPLAY_OVERLAP
+            )
+        finally:
+            db.close()
+
+    async def replay(self, revision: int) -> Optional[Tuple[int, Optional[StreamEvent]]]:
+        """
+        Changes since `revision` as current state of the changed records,
+        `None` when the stream can't be resumed and has to start from snapshot
+        or has failed before the snapshot
+        """
+        if not self.ready.is_set():
+            ready = asyncio.ensure_future(self.ready.wait())
+            # the task ends without snapshot when the stream fails
+            await asyncio.wait({ready, self.task}, return_when=asyncio.FIRST_COMPLETED)
+            ready.cancel()
+            if not self.ready.is_set():
+                return None
+        until = self.revision
+        if not self.tables or revision > until:
+            return None
+        changes = await run_in_threadpool(self.pull_log, revision, until)
+        if changes is None:
+            return None
+        if any(change.table_name != self.tables[0] for change in changes):
+            # records depend on the changed rows of other tables
+            return None
+
+        response = {
+            "new": [],
+            "updated": [],
+            "removed": []
+        }
+        inserted_ids = {change.row_id for change in changes if change.op == 'INSERT'}
+        for row_id in dict.fromkeys(change.row_id for change in changes):
+            if row_id in self.records:
+                event = "new" if row_id in inserted_ids else "updated"
+                response[event].append(self.records[row_id])
+            else:
+                # the stream may be created after the removal, the log is of the rows of the cam server
+                response["removed"].append(row_id)
+
+        if not (response["new"] or response["updated"] or response["removed"]):
+            return until, None
+        return until, StreamEvent(self.response_filter(response))
+
+    async def run(self) -> None:
+        subscription = None
+        if self.tables:
+            subscription = change_feed.subscribe(self.tables, self.kwargs.get('cam_server_id'))
+
+        time_cursor = datetime.utcnow()
+        try:
+            self.revision, self.records = await run_in_threadpool(self.pull_snapshot, time_cursor)
+            time_cursor -= timedelta(seconds=settings.STREAM_CURSOR_OVERLAP)
+            snapshot = self.snapshot()
+            self.ready.set()
+            for subscriber in list(self.subscribers):
+                if subscriber.revision is None:
+                    subscriber.put((self.revision, snapshot))
+
+            reconciled_at = monotonic()
+            while self.subscribers:
+                # without change feed any poll may find changes
+                notified = True
+                if subscription and change_feed.connected:
+                    notified = await subscription.wait(jitter(settings.STREAM_FALLBACK_INTERVAL))
+                else:
+                    await asyncio.sleep(jitter(self.delay))
+
+                # rows leaving the stream without update (e.g. hard delete) are found by reconciliation
+                reconcile = monotonic() - reconciled_at >= settings.STREAM_RECONCILE_INTERVAL
+                polled_at = datetime.utcnow()
+                started = monotonic()
+                revision, changed, existing_ids = await run_in_threadpool(
+                    self.pull_changes, self.revision, time_cursor, reconcile, notified
+                )
+                self.hub.record_poll(self, monotonic() - started, len(changed or ()))
+                if existing_ids is not None:
+                    reconciled_at = monotonic()
+                if changed is None:
+                    self.delay = min(self.delay * 2, max(settings.STREAM_MAX_DELAY, self.stream_delay))
+                    continue
+
+                response, previous = self.apply_changes(changed, existing_ids)
+                self.revision = revision
+                # rows committed with earlier `updated_at` during the poll are pulled again
+                time_cursor = polled_at - timedelta(seconds=settings.STREAM_CURSOR_OVERLAP)
+                if response["new"] or response["updated"] or response["removed"]:
+                    self.delay = self.stream_delay
+                    self.broadcast((revision, StreamEvent(self.response_filter(response), previous)))
+                else:
+                    self.delay = min(self.delay * 2, max(settings.STREAM_MAX_DELAY, self.stream_delay))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Stream {self.key} failed: {e}")
+        finally:
+            if subscription:
+                change_feed.unsubscribe(subscription)
+            self.hub.remove(self)
+
+
+class StreamHub:
+    '''
+    Streams shared by the connections with the same `pull_fn` and arguments,
+    the database is pulled once per distinct stream instead of once per connection
+    '''
+
+    def __init__(self, max_connections: int = settings.STREAM_MAX_CONNECTIONS) -> None:
+        self.max_connections = max_connections
+        self.streams: Dict[Tuple, Stream] = {}
+        self.polls = 0
+        self.poll_seconds = 0.0
+        self.pulled_rows = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def connections(self) -> int:
+        return sum(len(stream.subscribers) for stream in self.streams.values())
+
+    def is_full(self) -> bool:
+        """
+        Whether the worker has `max_connections` open, counted as rejection
+        """
+        if self.connections() < self.max_connections:
+            return False
+        self.rejections += 1
+        return True
+
+    def retry_after(self) -> int:
+        return int(jitter(settings.STREAM_RETRY_AFTER))
+
+    def record_poll(self, stream: Stream, seconds: float, rows: int) -> None:
+        stream.polls += 1
+        stream.poll_seconds += seconds
+        self.polls += 1
+        self.poll_seconds += seconds
+        self.pulled_rows += rows
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Open streams and cost of the polls of the worker since start
+        """
+        return {
+            'connections': self.connections(),
+            'max_connections': self.max_connections,
+            'polls': self.polls,
+            'poll_seconds': round(self.poll_seconds, 3),
+            'pulled_rows': self.pulled_rows,
+            'evictions': self.evictions,
+            'rejections': self.rejections,
+            'streams': [
+                {
+                    'pull_fn': getattr(stream.pull_fn, '__qualname__', str(stream.pull_fn)),
+                    'kwargs': stream.kwargs,
+                    'subscribers': len(stream.subscribers),
+                    'records': len(stream.records),
+                    'revision': stream.revision,
+                    'delay': stream.delay,
+                    'polls': stream.polls,
+                    'poll_seconds': round(stream.poll_seconds, 3),
+                }
+                for stream in self.streams.values()
+            ],
+        }
+
+    @staticmethod
+    def stream_key(
+        pull_fn: Callable, show_fields: List[str] = None,
+        stream_delay: int = 10, exclude_events: List[str] = None,
+        tables: List[str] = None,
+        kwargs: Dict[str, Any] = None,
+    ) -> Tuple:
+        return (
+            pull_fn,
+            tuple(show_fields or ()),
+            stream_delay,
+            tuple(exclude_events or ()),
+            tuple(tables or ()),
+            tuple(sorted((kwargs or {}).items())),
+        )
+
+    def subscribe(
+        self, pull_fn: Callable, revision: int = None, **options
+    ) -> Tuple[Stream, StreamSubscriber]:
+        key = self.stream_key(pull_fn, **options)
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = Stream(self, key, pull_fn, **options)
+            self.streams[key] = stream
+            subscriber = stream.subscribe(revision)
+            stream.task = asyncio.create_task(stream.run())
+        else:
+            subscriber = stream.subscribe(revision)
+        return stream, subscriber
+
+    async def listen(
+        self, pull_fn: Callable, revision: int = None, idle_timeout: float = None,
+        show_fields: List[str] = None, stream_delay: int = 10,
+        exclude_events: List[str] = None, tables: List[str] = None,
+        **kwargs
+    ) -> AsyncIterator[Optional[Tuple[int, StreamEvent]]]:
+        """
+        Events of the stream as `(revision, event)`, starting with the snapshot
+        or the replay since `revision`. `None` is yielded after `idle_timeout` without event.
+        Ends when the stream is closed or the connection is evicted, the client reconnects.
+        """
+        stream, subscriber = self.subscribe(
+            pull_fn,
+            revision=revision,
+            show_fields=show_fields,
+            stream_delay=stream_delay,
+            exclude_events=exclude_events,
+            tables=tables,
+            kwargs=kwargs
+        )
+        try:
+            if revision is not None:
+                # events broadcast meanwhile are queued and sent after, ending in the same state
+                replay = await stream.replay(revision)
+                if not stream.ready.is_set():
+                    # the stream failed, its subscribers are closed
+                    return
+                if replay is None:
+                    replay = stream.revision, stream.snapshot()
+                if replay[1]:
+                    yield replay
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=idle_timeout)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            self.unsubscribe(stream, subscriber)
+
+    def unsubscribe(self, stream: Stream, subscriber: StreamSubscriber) -> None:
+        stream.subscribers.discard(subscriber)
+        if not stream.subscribers:
+            self.remove(stream)
+            if stream.task and not stream.task.done():
+                stream.task.cancel()
+
+    def remove(self, stream: Stream) -> None:
+        if self.streams.get(stream.key) is stream:
+            del self.streams[stream.key]
+        stream.close()
+
+
+stream_hub = StreamHub()
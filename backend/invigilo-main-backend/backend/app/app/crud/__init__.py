@@ -6,12 +6,15 @@ from .crud_cam_frame import cam_frame
 from .crud_ai_server import ai_server
 from .crud_camera import camera
 from .crud_incident import incident
+from .crud_incident_rollup import incident_rollup
 from .crud_ai_sequence import ai_sequence
 from .crud_ai_vertex import ai_vertex
 from .crud_ai_edge import ai_edge
 from .crud_ai_type import ai_type
 from .crud_cam_ai_mapping import cam_ai_mapping
 from .crud_upload import upload
+from .crud_report_job import report_job
+from .crud_change_log import change_log
 
 # For a new basic set of CRUD operations you could just do
 
@@ -60,15 +60,19 @@ class CRUD_AI_Sequence(CRUDBase[AI_Sequence, AI_SequenceCreate, AI_SequenceUpdat
         params: QueryParams = None,
         updated_before: datetime = None,
         updated_after: datetime = None,
-        count: bool = False
+        count: bool = False,
+        include_deleted: bool = False
     ) -> List[AI_SequenceOut]:
         query = (db.query(self.model)
-                 .filter(self.model.deleted == False)
                  .join(Cam_AI_Mapping, AI_Sequence.id == Cam_AI_Mapping.sequence_id, isouter=True)
                  .join(Camera, Camera.id == Cam_AI_Mapping.camera_id, isouter=True)
                  .join(Cam_Server, Cam_Server.id == Camera.cam_server_id, isouter=True)
                  .filter(Cam_Server.id == cam_server_id)
+                 # one row per sequence for all its mappings
+                 .distinct()
                  )
+        if not include_deleted:
+            query = query.filter(self.model.deleted == False)
         if updated_before:
             query = query.filter(self.model.updated_at <= updated_before)
         if updated_after:
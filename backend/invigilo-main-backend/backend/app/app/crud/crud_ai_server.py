@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import Any, List
 from warnings import filters
 
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
 from app.models import AI_Vertex, AI_Sequence, Cam_AI_Mapping, Camera, Cam_Server
@@ -47,17 +48,21 @@ class CRUD_AI_Server(CRUDBase[AI_Server, AI_ServerCreate, AI_ServerUpdate]):
         company_id: int = None,
         updated_before: datetime = None,
         updated_after: datetime = None,
-        count: bool = False
+        count: bool = False,
+        include_deleted: bool = False
     ) -> List[Any]:
         query = (db.query(self.model)
-                 .filter(self.model.deleted == False)
                  .join(AI_Vertex, AI_Vertex.server_id == self.model.id, isouter=True)
-                 .join(AI_Sequence, AI_Sequence.id == AI_Vertex.sequence_id and AI_Sequence.company_id == company_id, isouter=True)
+                 .join(AI_Sequence, and_(AI_Sequence.id == AI_Vertex.sequence_id, AI_Sequence.company_id == company_id), isouter=True)
                  .join(Cam_AI_Mapping, Cam_AI_Mapping.sequence_id == AI_Sequence.id, isouter=True)
                  .join(Camera, Camera.id == Cam_AI_Mapping.camera_id, isouter=True)
                  .join(Cam_Server, Cam_Server.id == Camera.cam_server_id, isouter=True)
                  .filter(Cam_Server.id == cam_server_id)
+                 # one row per server for all its vertexes and mappings
+                 .distinct()
                  )
+        if not include_deleted:
+            query = query.filter(self.model.deleted == False)
         if updated_before:
             query = query.filter(self.model.updated_at <= updated_before)
         if updated_after:
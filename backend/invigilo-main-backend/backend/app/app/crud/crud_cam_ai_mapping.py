@@ -33,14 +33,16 @@ class CRUD_Cam_AI_Mapping(CRUDBase[Cam_AI_Mapping, Cam_AI_MappingCreate, Cam_AI_
         cam_server_id: int = None,
         updated_before: datetime = None,
         updated_after: datetime = None,
-        count: bool = False
+        count: bool = False,
+        include_deleted: bool = False
     ) -> List[Any]:
         query = (db.query(self.model)
-                 .filter(self.model.deleted == False)
                  .join(Camera, Camera.id == Cam_AI_Mapping.camera_id, isouter=True)
                  .join(Cam_Server, Cam_Server.id == Camera.cam_server_id, isouter=True)
                  .filter(Cam_Server.id == cam_server_id)
                  )
+        if not include_deleted:
+            query = query.filter(self.model.deleted == False)
         if updated_before:
             query = query.filter(self.model.updated_at <= updated_before)
         if updated_after:
@@ -1,12 +1,145 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, func, select
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.crud.base import CRUDBase
 from app.models.cam_frame import Cam_Frame
-from app.schemas.cam_frame import CameraFrameCreate, CameraFrameUpdate
+from app.models.cam_server import Cam_Server
+from app.models.camera import Camera
+from app.models.company import Company
+from app.schemas.cam_frame import CameraFrameCreate, CameraFrameRetention, CameraFrameUpdate
 
 
 class CRUDCam_Frame(CRUDBase[Cam_Frame, CameraFrameCreate, CameraFrameUpdate]):
-    pass
+    def get_retention(self, company: Company = None) -> CameraFrameRetention:
+        meta = company.meta if company and company.meta else {}
+        return CameraFrameRetention(**meta.get('frame_retention', {}))
+
+    def get_camera_ids(self, db: Session, company_id: int = None) -> List[int]:
+        # deleted cameras are included, their frames are expired as well
+        query = (
+            db.query(Camera.id)
+            .outerjoin(Cam_Server, Cam_Server.id == Camera.cam_server_id)
+        )
+        if company_id:
+            query = query.filter(Cam_Server.company_id == company_id)
+        else:
+            query = query.filter(Cam_Server.company_id.is_(None))
+        return [camera_id for (camera_id,) in query.all()]
+
+    def remove_batch(self, db: Session, ids_query) -> List[Any]:
+        """
+        Hard-delete the frames selected by `ids_query`, returns `image` and `video` of removed rows
+        """
+        query = (
+            delete(self.model)
+            .where(self.model.id.in_(ids_query))
+            .returning(self.model.image, self.model.video)
+            .execution_options(synchronize_session=False)
+        )
+        rows = db.execute(query).all()
+        db.commit()
+        return rows
+
+    def downsample(
+        self, db: Session, *,
+        camera_ids: List[int],
+        start: datetime,
+        end: datetime,
+        interval: int,
+        limit: int = None
+    ) -> List[Any]:
+        """
+        Keep only the latest frame per camera per `interval` (in seconds) created between `start` and `end`
+        """
+        bucket = func.floor(func.extract('epoch', self.model.created_at) / interval)
+        ranked = (
+            select(
+                self.model.id,
+                func.row_number().over(
+                    partition_by=(self.model.camera_id, bucket),
+                    order_by=self.model.created_at.desc()
+                ).label('rank')
+            )
+            .where(self.model.camera_id.in_(camera_ids))
+            .where(self.model.created_at >= start)
+            .where(self.model.created_at < end)
+            .subquery()
+        )
+        ids_query = (
+            select(ranked.c.id)
+            .where(ranked.c.rank > 1)
+            .limit(limit or settings.CAM_FRAME_RETENTION_BATCH_SIZE)
+        )
+        return self.remove_batch(db, ids_query)
+
+    def expire(
+        self, db: Session, *,
+        camera_ids: List[int],
+        before: datetime,
+        limit: int = None
+    ) -> List[Any]:
+        """
+        Remove the frames created before `before`
+        """
+        ids_query = (
+            select(self.model.id)
+            .where(self.model.camera_id.in_(camera_ids))
+            .where(self.model.created_at < before)
+            .limit(limit or settings.CAM_FRAME_RETENTION_BATCH_SIZE)
+        )
+        return self.remove_batch(db, ids_query)
+
+    def apply_retention(
+        self, db: Session, *,
+        company: Company = None,
+        now: datetime = None
+    ) -> Dict[str, Any]:
+        """
+        Downsample and expire the frames of company cameras in bounded batches,
+        when `company` is not set applies defaults for cameras without company
+        """
+        retention = self.get_retention(company)
+        camera_ids = self.get_camera_ids(db, company.id if company else None)
+        now = now or datetime.utcnow()
+        hot_before = now - timedelta(seconds=retention.hot_interval)
+        expire_before = now - timedelta(seconds=retention.expire_interval)
+        batch_size = settings.CAM_FRAME_RETENTION_BATCH_SIZE
+
+        result = {'downsampled': 0, 'expired': 0, 'uploads': []}
+        if not camera_ids:
+            return result
+
+        def collect(rows):
+            if retention.delete_uploads:
+                for row in rows:
+                    result['uploads'].extend([key for key in (row.image, row.video) if key])
+            return len(rows)
+
+        while True:
+            count = collect(self.expire(
+                db, camera_ids=camera_ids, before=expire_before, limit=batch_size
+            ))
+            result['expired'] += count
+            if count < batch_size:
+                break
+
+        if retention.downsample_interval and hot_before > expire_before:
+            while True:
+                count = collect(self.downsample(
+                    db, camera_ids=camera_ids,
+                    start=expire_before, end=hot_before,
+                    interval=retention.downsample_interval,
+                    limit=batch_size
+                ))
+                result['downsampled'] += count
+                if count < batch_size:
+                    break
+
+        return result
 
 
 cam_frame = CRUDCam_Frame(Cam_Frame)
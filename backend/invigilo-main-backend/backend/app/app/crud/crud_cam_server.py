@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, List, Union
 
+from sqlalchemy import or_, update
 from sqlalchemy.orm import Session
 
+from app.core.report_cache import report_cache
 from app.crud.base import CRUDBase
 from app.models.cam_server import Cam_Server
 from app.schemas.cam_server import Cam_ServerCreate, Cam_ServerUpdate, CamServerFilters
@@ -10,6 +12,29 @@ from app.schemas.core import QueryParams
 
 
 class CRUD_Cam_Server(CRUDBase[Cam_Server, Cam_ServerCreate, Cam_ServerUpdate]):
+    # servers are listed by reports
+    def create(self, db: Session, *, obj_in: Cam_ServerCreate) -> Cam_Server:
+        server = super().create(db=db, obj_in=obj_in)
+        report_cache.invalidate(server.company_id)
+        return server
+
+    def update(
+        self, db: Session, *,
+        db_obj: Cam_Server,
+        obj_in: Union[Cam_ServerUpdate, Dict[str, Any]]
+    ) -> Cam_Server:
+        company_id = db_obj.company_id
+        server = super().update(db=db, db_obj=db_obj, obj_in=obj_in)
+        if server:
+            report_cache.invalidate(company_id)
+            report_cache.invalidate(server.company_id)
+        return server
+
+    def remove(self, db: Session, *, id: int) -> Cam_Server:
+        server = super().remove(db=db, id=id)
+        report_cache.invalidate(server.company_id)
+        return server
+
     def get_multi_by_company(
         self, db: Session,
         company_id: int,
@@ -74,6 +99,44 @@ class CRUD_Cam_Server(CRUDBase[Cam_Server, Cam_ServerCreate, Cam_ServerUpdate]):
             .first()
         )
 
+    def update_seen(self, db: Session, *, id: int, seen_at: datetime, refresh_before: datetime) -> int:
+        """
+        Mark the server live on heartbeat, `last_seen` is written only when older than `refresh_before`
+        """
+        count = (
+            db.query(self.model)
+            .filter(self.model.id == id)
+            .filter(or_(
+                self.model.is_live.isnot(True),
+                self.model.last_seen.is_(None),
+                self.model.last_seen < refresh_before
+            ))
+            .update(
+                {
+                    self.model.is_live: True,
+                    self.model.last_seen: seen_at,
+                    self.model.updated_at: self.model.updated_at
+                },
+                synchronize_session=False
+            )
+        )
+        db.commit()
+        return count
+
+    def expire_live(self, db: Session, *, seen_before: datetime) -> List[int]:
+        """
+        Mark offline the live servers without heartbeat since `seen_before`, returns their ids
+        """
+        ids = db.execute(
+            update(self.model)
+            .where(self.model.is_live == True)
+            .where(self.model.last_seen < seen_before)
+            .values({self.model.is_live: False, self.model.updated_at: self.model.updated_at})
+            .returning(self.model.id)
+        ).scalars().all()
+        db.commit()
+        return ids
+
     def is_active(self, server: Cam_Server) -> bool:
         return server.is_active
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List
+from typing import Dict, List
 
 from sqlalchemy.orm import Session
 from fastapi.encoders import jsonable_encoder
@@ -19,12 +19,14 @@ class CRUDCamera(CRUDBase[Camera, CameraCreate, CameraUpdate]):
         params: QueryParams = None,
         updated_before: datetime = None,
         updated_after: datetime = None,
-        count: bool = False
+        count: bool = False,
+        include_deleted: bool = False
     ) -> List[Camera]:
         query = (db.query(self.model)
-                 .filter(self.model.deleted == False)
                  .filter(self.model.cam_server_id == cam_server_id)
                  )
+        if not include_deleted:
+            query = query.filter(self.model.deleted == False)
         if updated_before:
             query = query.filter(self.model.updated_at <= updated_before)
         if updated_after:
@@ -62,6 +64,34 @@ class CRUDCamera(CRUDBase[Camera, CameraCreate, CameraUpdate]):
     def update_status(self, db: Session, *, db_obj: Camera, obj_in: CameraStatus) -> Camera:
         return super().update(db, db_obj=db_obj, obj_in=obj_in)
 
+    def get_status_by_cam_server(self, db: Session, cam_server_id: int) -> Dict[int, bool]:
+        rows = (
+            db.query(self.model.id, self.model.is_live)
+            .filter(self.model.deleted == False)
+            .filter(self.model.cam_server_id == cam_server_id)
+            .all()
+        )
+        return {camera_id: bool(is_live) for (camera_id, is_live) in rows}
+
+    def update_status_multi(
+        self, db: Session, *,
+        is_live: bool,
+        ids: List[int] = None,
+        cam_server_id: int = None
+    ) -> int:
+        query = db.query(self.model).filter(self.model.is_live.is_distinct_from(is_live))
+        if ids is not None:
+            query = query.filter(self.model.id.in_(ids))
+        if cam_server_id:
+            query = query.filter(self.model.cam_server_id == cam_server_id)
+        # keep `updated_at`, same as `receive_before_update` does for single camera
+        count = query.update(
+            {self.model.is_live: is_live, self.model.updated_at: self.model.updated_at},
+            synchronize_session=False
+        )
+        db.commit()
+        return count
+
     def update(self, db: Session, *, db_obj: Camera, obj_in: CameraUpdate) -> CameraExtended:
         map_exclude_fields = ['camera_id']
         ai_mapping = obj_in.ai_mapping
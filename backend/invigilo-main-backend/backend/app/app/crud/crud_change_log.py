@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from typing import Any, List, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.change_log import Change_Log
+
+
+class CRUDChange_Log(CRUDBase[Change_Log, Any, Any]):
+    def get_revision(
+        self, db: Session, *,
+        tables: List[str] = None,
+        cam_server_id: Optional[int] = None
+    ) -> int:
+        """
+        Latest revision of `tables` or all tables, `0` when the log is empty
+        """
+        query = db.query(func.coalesce(func.max(self.model.id), 0))
+        if tables:
+            query = query.filter(self.model.table_name.in_(tables))
+        if cam_server_id is not None:
+            query = query.filter(or_(
+                self.model.cam_server_id == cam_server_id,
+                self.model.cam_server_id.is_(None)
+            ))
+        return query.scalar()
+
+    def is_truncated(self, db: Session, revision: int) -> bool:
+        """
+        Whether changes after `revision` may have been trimmed from the log
+        """
+        first = db.query(func.min(self.model.id)).scalar()
+        return first is None or first > revision + 1
+
+    def get_since(
+        self, db: Session, *,
+        revision: int,
+        until: int,
+        tables: List[str],
+        cam_server_id: Optional[int] = None,
+        overlap: int = 0
+    ) -> List[Change_Log]:
+        """
+        Changes after `revision` until `until`, with the changes created
+        within `overlap` seconds before `revision` which may have been committed after it
+        """
+        query = (
+            db.query(self.model)
+            .filter(self.model.id <= until)
+            .filter(self.model.table_name.in_(tables))
+        )
+        created_at = db.query(self.model.created_at).filter(self.model.id == revision).scalar()
+        if created_at and overlap:
+            query = query.filter(or_(
+                self.model.id > revision,
+                self.model.created_at >= created_at - timedelta(seconds=overlap)
+            ))
+        else:
+            query = query.filter(self.model.id > revision)
+        if cam_server_id is not None:
+            query = query.filter(or_(
+                self.model.cam_server_id == cam_server_id,
+                self.model.cam_server_id.is_(None)
+            ))
+        return query.order_by(self.model.id).all()
+
+    def has_changes(
+        self, db: Session, *,
+        revision: int,
+        tables: List[str],
+        cam_server_id: Optional[int] = None,
+        created_after: datetime = None
+    ) -> bool:
+        """
+        Whether `tables` changed after `revision`, or since `created_after` for the changes
+        with lower id committed after `revision` was read
+        """
+        query = (
+            db.query(self.model.id)
+            .filter(self.model.table_name.in_(tables))
+        )
+        if created_after:
+            query = query.filter(or_(
+                self.model.id > revision,
+                self.model.created_at > created_after
+            ))
+        else:
+            query = query.filter(self.model.id > revision)
+        if cam_server_id is not None:
+            query = query.filter(or_(
+                self.model.cam_server_id == cam_server_id,
+                self.model.cam_server_id.is_(None)
+            ))
+        return db.query(query.exists()).scalar()
+
+    def trim(self, db: Session, before: datetime) -> int:
+        """
+        Delete changes created before `before`, the latest change is always kept
+        """
+        count = (
+            db.query(self.model)
+            .filter(self.model.created_at < before)
+            .filter(self.model.id < self.get_revision(db))
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return count
+
+
+change_log = CRUDChange_Log(Change_Log)
@@ -1,18 +1,23 @@
 from copy import deepcopy
 from datetime import datetime, timedelta
-from typing import Any, List, Union
+from typing import Any, Dict, Iterator, List, Union
 
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app import crud
 from app.core.config import settings
+from app.core.report_cache import report_cache
 from app.models import Camera, Incident, Cam_Server
 from app.crud.base import CRUDBase
 from app.models.incident import Incident
 from app.schemas import IncidentCreate, IncidentFilters, IncidentUpdate, IncidentFilters
 from app.schemas.core import QueryParams
 
+# changes of these fields are reflected in reports
+REPORTED_FIELDS = {'type', 'camera_id', 'inaccurate', 'deleted', 'created_at'}
+
 
 class CRUDIncident(CRUDBase[Incident, IncidentCreate, IncidentUpdate]):
     def create(
@@ -32,8 +37,29 @@ class CRUDIncident(CRUDBase[Incident, IncidentCreate, IncidentUpdate]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self.invalidate_reports(db_obj)
         return db_obj
 
+    def update(
+        self, db: Session, *,
+        db_obj: Incident,
+        obj_in: Union[IncidentUpdate, Dict[str, Any]]
+    ) -> Incident:
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        incident = super().update(db=db, db_obj=db_obj, obj_in=obj_in)
+        if incident and REPORTED_FIELDS.intersection(update_data):
+            self.invalidate_reports(incident)
+        return incident
+
+    def remove(self, db: Session, *, id: int) -> Incident:
+        incident = super().remove(db=db, id=id)
+        self.invalidate_reports(incident)
+        return incident
+
+    def invalidate_reports(self, incident: Incident) -> None:
+        if incident.camera and incident.camera.cam_server:
+            report_cache.invalidate(incident.camera.cam_server.company_id, incident.created_at)
+
     def get_multi_by_camera(
         self, db: Session,
         camera_id: int,
@@ -45,13 +71,16 @@ class CRUDIncident(CRUDBase[Incident, IncidentCreate, IncidentUpdate]):
 
         return query.all()
 
-    def get_multi(
+    def query_by_filters(
         self, db: Session,
-        params: QueryParams = None,
         filters: IncidentFilters = None,
-        company_id: int = None
-    ) -> List[Incident]:
-        query = db.query(Incident)
+        company_id: int = None,
+        entities: List[Any] = None
+    ):
+        """
+        Query of incidents (or `entities`) matching `filters` of the company
+        """
+        query = db.query(*(entities or [Incident]))
 
         if company_id:
             query = (
@@ -61,31 +90,104 @@ class CRUDIncident(CRUDBase[Incident, IncidentCreate, IncidentUpdate]):
                 .filter(Cam_Server.company_id == company_id)
             )
 
-        if filters.camera__cam_server_id:
-            filters.camera_id = None
-        if filters.acknowledged:
-            filters.acknowledged = ('is_not_null',)
-        if filters.created_at_from:
-            filters.created_at = [('>=', filters.created_at_from)]
-        if filters.created_at_to:
-            filters.created_at.append(('<=', filters.created_at_to))
+        if filters:
+            filters = filters.copy()
+            if filters.camera__cam_server_id:
+                filters.camera_id = None
+            if filters.acknowledged:
+                filters.acknowledged = ('is_not_null',)
+            created_at = []
+            if filters.created_at_from:
+                created_at.append(('>=', filters.created_at_from))
+            if filters.created_at_to:
+                created_at.append(('<=', filters.created_at_to))
+            if created_at:
+                filters.created_at = created_at
+
+        return self.query_filters(query, filters)
 
-        query = self.query_filters(query, filters)
+    def get_multi(
+        self, db: Session,
+        params: QueryParams = None,
+        filters: IncidentFilters = None,
+        company_id: int = None
+    ) -> List[Incident]:
+        query = self.query_by_filters(db, filters, company_id)
         query = self.query_order_by(query, params)
         query = self.query_limit(query, params)
 
         return query.all()
 
+    def get_batches_by_filters(
+        self, db: Session,
+        filters: IncidentFilters = None,
+        company_id: int = None,
+        entities: List[Any] = None,
+        batch_size: int = 500,
+        limit: int = None
+    ) -> Iterator[List[Any]]:
+        """
+        Batches of incidents ordered by `id`, fetched by keyset instead of offset,
+        rows of `entities` have the `keyset_id` column added
+        """
+        query = self.query_by_filters(db, filters, company_id, entities=entities)
+        if entities:
+            query = query.add_columns(Incident.id.label('keyset_id'))
+        last_id = 0
+        fetched = 0
+        while limit is None or fetched < limit:
+            size = batch_size if limit is None else min(batch_size, limit - fetched)
+            batch = (
+                query
+                .filter(Incident.id > last_id)
+                .order_by(Incident.id)
+                .limit(size)
+                .all()
+            )
+            if not batch:
+                break
+            yield batch
+            fetched += len(batch)
+            last_id = batch[-1].keyset_id if entities else batch[-1].id
+            if len(batch) < size:
+                break
+
+    def get_summary_by_filters(
+        self, db: Session,
+        filters: IncidentFilters = None,
+        company_id: int = None
+    ) -> List[Any]:
+        """
+        Count of incidents by `location` and `type`
+        """
+        query = self.query_by_filters(
+            db, filters, company_id,
+            entities=[Incident.location, Incident.type, func.count(Incident.id).label('i_count')]
+        )
+        return (
+            query
+            .group_by(Incident.location, Incident.type)
+            .order_by(Incident.location, func.count(Incident.id).desc())
+            .all()
+        )
+
+    def get_count_by_filters(
+        self, db: Session,
+        filters: IncidentFilters = None,
+        company_id: int = None
+    ) -> int:
+        return self.query_by_filters(db, filters, company_id, entities=[func.count(Incident.id)]).scalar()
+
     def get_multi_updated_by_link(
         self, db: Session,
         params: QueryParams = None,
         cam_server_id: int = None,
         updated_before: datetime = None,
         updated_after: datetime = None,
-        count: bool = False
+        count: bool = False,
+        include_deleted: bool = False
     ) -> List[Any]:
         query = (db.query(self.model)
-                 .filter(self.model.deleted == False)
                  .join(Camera, Camera.id == Incident.camera_id, isouter=True)
                  .join(Cam_Server, Cam_Server.id == Camera.cam_server_id, isouter=True)
                  .filter(Cam_Server.id == cam_server_id)
@@ -94,6 +196,8 @@ class CRUDIncident(CRUDBase[Incident, IncidentCreate, IncidentUpdate]):
         query = query.filter(self.model.created_at >= (
             datetime.utcnow() - timedelta(seconds=settings.NOTIFICATION_TIME_WINDOW)))
 
+        if not include_deleted:
+            query = query.filter(self.model.deleted == False)
         if updated_before:
             query = query.filter(self.model.updated_at <= updated_before)
         if updated_after:
@@ -115,7 +219,7 @@ class CRUDIncident(CRUDBase[Incident, IncidentCreate, IncidentUpdate]):
             if not meta:
                 meta = {}
             meta['mark_by'] = by_user
-        return super().update(db=db, db_obj=incident, obj_in={flag: value, 'meta': meta})
+        return self.update(db=db, db_obj=incident, obj_in={flag: value, 'meta': meta})
 
     def mark_acknowledged(self, db: Session, id: int, by_user: str) -> Incident:
         return self.mark_flag(db, id, 'acknowledged', datetime.utcnow(), by_user)
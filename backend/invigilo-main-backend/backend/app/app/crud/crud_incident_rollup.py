@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta
+from typing import Any, List
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+from app.crud.base import CRUDBase
+from app.models.incident_rollup import Incident_Rollup
+
+HOUR = timedelta(hours=1)
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(value: datetime) -> datetime:
+    floored = floor_hour(value)
+    return floored if floored == value else floored + HOUR
+
+
+class CRUDIncident_Rollup(CRUDBase[Incident_Rollup, Any, Any]):
+    def rebuild(self, db: Session, start: datetime = None, end: datetime = None) -> int:
+        """
+        Recount the hours between `start` and `end` from raw incidents, all hours when not set
+        """
+        sql_params = {'now': datetime.utcnow()}
+        rollup_where = ['true']
+        incident_where = ['incident.deleted = false']
+        if start:
+            sql_params['start'] = floor_hour(start)
+            rollup_where.append('bucket >= :start')
+            incident_where.append('incident.created_at >= :start')
+        if end:
+            sql_params['end'] = ceil_hour(end)
+            rollup_where.append('bucket < :end')
+            incident_where.append('incident.created_at < :end')
+
+        db.execute(text(f'''
+delete from incident_rollup
+where
+	{' and '.join(rollup_where)}
+'''), sql_params)
+        result = db.execute(text(f'''
+insert into incident_rollup (
+	company_id, cam_server_id, camera_id, type, bucket,
+	count, inaccurate_count, created_at, updated_at, deleted
+)
+select
+	cam_server.company_id,
+	camera.cam_server_id,
+	camera.id,
+	incident.type,
+	date_trunc('hour', incident.created_at) as bucket,
+	count(incident.id),
+	count(incident.id) filter (where incident.inaccurate = true),
+	:now,
+	:now,
+	false
+from
+	incident
+join camera on
+	camera.id = incident.camera_id
+join cam_server on
+	cam_server.id = camera.cam_server_id
+where
+	{' and '.join(incident_where)}
+group by
+	cam_server.company_id,
+	camera.cam_server_id,
+	camera.id,
+	incident.type,
+	bucket
+'''), sql_params)
+        db.commit()
+        return result.rowcount
+
+    def get_counts(
+        self, db: Session, *,
+        company_id: int,
+        start: datetime,
+        end: datetime,
+        by_type: bool = False,
+        interval: timedelta = None,
+    ) -> List[Any]:
+        """
+        Count of accurate incidents created from `start` until `end` grouped by `cam_server_id`,
+        and by `type_index` when `by_type`, and by `x_from` of each `interval` from `start` when `interval` is set.
+
+        Closed hours are answered from the rollup, the edges and the current hour from raw incidents.
+        """
+        start = start.replace(tzinfo=None)
+        end = end.replace(tzinfo=None)
+        rollup_start = ceil_hour(start)
+        rollup_end = min(floor_hour(end), floor_hour(datetime.utcnow()))
+        if interval and (interval.total_seconds() % HOUR.total_seconds() or rollup_start != start):
+            # hours of the rollup can't be split by buckets
+            rollup_start = rollup_end
+        if rollup_start >= rollup_end:
+            rollup_start = rollup_end = end
+
+        sql_params = {
+            'company_id': company_id,
+            'start': start,
+            'end': end,
+            'rollup_start': rollup_start,
+            'rollup_end': rollup_end,
+        }
+        group_by = ['cam_server_id']
+        incident_columns = ['camera.cam_server_id']
+        rollup_columns = ['incident_rollup.cam_server_id']
+        if by_type:
+            group_by.append('type_index')
+            incident_columns.append("unnest(string_to_array(incident.type, ',')) as type_index")
+            rollup_columns.append("unnest(string_to_array(incident_rollup.type, ',')) as type_index")
+        if interval:
+            sql_params['gap_interval'] = int(interval.total_seconds())
+            group_by.append('x_from')
+            incident_columns.append("date_bin(:gap_interval * interval '1 second', incident.created_at, :start) as x_from")
+            rollup_columns.append("date_bin(:gap_interval * interval '1 second', incident_rollup.bucket, :start) as x_from")
+
+        sql = f'''
+select
+	{', '.join(group_by)},
+	cast(sum(i_count) as integer) as i_count
+from
+	(
+	select
+		{', '.join(incident_columns)},
+		count(incident.id) as i_count
+	from
+		incident
+	join camera on
+		camera.id = incident.camera_id
+	join cam_server on
+		cam_server.id = camera.cam_server_id
+	where
+		incident.deleted = false
+		and incident.inaccurate = false
+		and cam_server.company_id = :company_id
+		and (
+			(incident.created_at >= :start and incident.created_at < :rollup_start)
+			or (incident.created_at >= :rollup_end and incident.created_at < :end)
+		)
+	group by
+		{', '.join(group_by)}
+	union all
+	select
+		{', '.join(rollup_columns)},
+		sum(incident_rollup.count - incident_rollup.inaccurate_count) as i_count
+	from
+		incident_rollup
+	where
+		incident_rollup.company_id = :company_id
+		and incident_rollup.bucket >= :rollup_start
+		and incident_rollup.bucket < :rollup_end
+	group by
+		{', '.join(group_by)}
+	) as counts
+group by
+	{', '.join(group_by)}
+'''
+        return db.execute(text(sql), sql_params).all()
+
+
+incident_rollup = CRUDIncident_Rollup(Incident_Rollup)
@@ -0,0 +1,50 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.report_job import Report_Job
+from app.schemas.report_job import ReportJobCreate, ReportJobUpdate
+
+
+class CRUDReport_Job(CRUDBase[Report_Job, ReportJobCreate, ReportJobUpdate]):
+    def get_by_uuid(self, db: Session, uuid: UUID) -> Report_Job:
+        return (
+            db.query(self.model)
+            .filter(self.model.uuid == uuid)
+            .filter(self.model.deleted == False)
+            .first()
+        )
+
+    def get_scheduled(
+        self, db: Session, *,
+        company_id: int,
+        period: str,
+        start: datetime,
+        status: str = None
+    ) -> Report_Job:
+        """
+        Latest report of the period generated by schedule
+        """
+        query = (
+            db.query(self.model)
+            .filter(self.model.user_id.is_(None))
+            .filter(self.model.company_id == company_id)
+            .filter(self.model.period == period)
+            .filter(self.model.start == start)
+            .filter(self.model.deleted == False)
+        )
+        if status:
+            query = query.filter(self.model.status == status)
+        return query.order_by(self.model.id.desc()).first()
+
+    def set_progress(self, db: Session, *, id: int, progress: int) -> None:
+        db.query(self.model).filter(self.model.id == id).update(
+            {'progress': progress, 'updated_at': datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+
+
+report_job = CRUDReport_Job(Report_Job)
@@ -1,6 +1,7 @@
 from uuid import uuid4
 from datetime import datetime, timedelta
-import boto3
+from threading import Lock
+from typing import List
 import mimetypes
 
 from fastapi import UploadFile
@@ -11,12 +12,26 @@ from app.core.config import settings
 
 class CRUDUpload:
     def __init__(self) -> None:
-        self.s3 = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY,
-            aws_secret_access_key=settings.AWS_SECRET_KEY
-        )
         self.bucket = settings.S3_BUCKET
+        self._s3 = None
+        self._s3_lock = Lock()
+
+    @property
+    def s3(self):
+        '''
+        S3 client created on first use
+        '''
+        if self._s3 is None:
+            with self._s3_lock:
+                if self._s3 is None:
+                    import boto3
+
+                    self._s3 = boto3.client(
+                        's3',
+                        aws_access_key_id=settings.AWS_ACCESS_KEY,
+                        aws_secret_access_key=settings.AWS_SECRET_KEY
+                    )
+        return self._s3
 
     async def fetch_upload(self, object_key: str):
         try:
@@ -73,6 +88,54 @@ class CRUDUpload:
             "object_id": object_key
         }
 
+    def get_object(self, object_key: str) -> bytes:
+        try:
+            s3_response = self.s3.get_object(
+                Bucket=self.bucket,
+                Key=object_key,
+            )
+            if s3_response["ResponseMetadata"]["HTTPStatusCode"] == 200:
+                return s3_response['Body'].read()
+        except Exception as e:
+            # TODO consider other exceptions
+            print("ERROR:get_object:", e)
+        return None
+
+    def put_object(self, object_key: str, data: bytes, content_type: str = None) -> str:
+        try:
+            s3_response = self.s3.put_object(
+                Bucket=self.bucket,
+                Key=object_key,
+                Body=data,
+                ContentType=content_type or mimetypes.guess_type(object_key)[0] or 'application/octet-stream'
+            )
+            if s3_response["ResponseMetadata"]["HTTPStatusCode"] != 200:
+                object_key = None
+        except Exception as e:
+            # TODO consider other exceptions
+            print("ERROR:put_object:", e)
+            object_key = None
+        return object_key
+
+    def remove_objects(self, object_keys: List[str]) -> int:
+        removed = 0
+        # S3 accepts up to 1000 keys per request
+        for i in range(0, len(object_keys), 1000):
+            chunk = object_keys[i:i + 1000]
+            try:
+                s3_response = self.s3.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={
+                        'Objects': [{'Key': key} for key in chunk],
+                        'Quiet': True
+                    }
+                )
+                removed += len(chunk) - len(s3_response.get('Errors', []))
+            except Exception as e:
+                # TODO consider other exceptions
+                print("ERROR:remove_objects:", e)
+        return removed
+
     async def move_temporary_upload(self, object_key: str, move_key: str):
         try:
             self.s3.copy(
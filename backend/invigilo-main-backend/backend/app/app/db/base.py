@@ -7,7 +7,10 @@ from app.models.cam_server import Cam_Server  # noqa
 from app.models.ai_server import AI_Server  # noqa
 from app.models.camera import Camera  # noqa
 from app.models.incident import Incident  # noqa
+from app.models.incident_rollup import Incident_Rollup  # noqa
 from app.models.ai_sequence import AI_Sequence  # noqa
 from app.models.ai_vertex import AI_Vertex  # noqa
 from app.models.ai_edge import AI_Edge  # noqa
 from app.models.ai_type import AI_Type  # noqa
+from app.models.report_job import Report_Job  # noqa
+from app.models.change_log import Change_Log  # noqa
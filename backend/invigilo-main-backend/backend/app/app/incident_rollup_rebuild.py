@@ -0,0 +1,32 @@
+import argparse
+import logging
+from datetime import datetime
+
+from app import crud
+from app.db.session import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rebuild(start: datetime = None, end: datetime = None) -> int:
+    db = SessionLocal()
+    try:
+        return crud.incident_rollup.rebuild(db, start=start, end=end)
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild hourly incident rollup from raw incidents")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None, help="e.g. 2022-05-01")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None, help="e.g. 2022-06-01")
+    args = parser.parse_args()
+
+    logger.info(f"Rebuilding incident rollup from {args.start or 'beginning'} to {args.end or 'now'}")
+    count = rebuild(args.start, args.end)
+    logger.info(f"Incident rollup rebuilt, {count} rows")
+
+
+if __name__ == "__main__":
+    main()
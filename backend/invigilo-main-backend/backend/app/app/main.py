@@ -1,10 +1,14 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 from starlette.middleware.cors import CORSMiddleware
 # from fastapi_pagination import add_pagination
 
 from app.api.api_v1.api import api_router, tags_meta
+from app.core.change_feed import change_feed
 from app.core.config import settings
+from app.core.presence import presence_tracker
 
 app = FastAPI(openapi_url=f"{settings.API_V1_STR}/openapi.json")
 
@@ -21,6 +25,22 @@ if settings.BACKEND_CORS_ORIGINS:
 app.include_router(api_router, prefix=settings.API_V1_STR)
 # add_pagination(app)
 
+
+@app.on_event("startup")
+async def start_presence_tracker():
+    asyncio.create_task(presence_tracker.run())
+
+
+@app.on_event("startup")
+async def start_change_feed():
+    change_feed.start(asyncio.get_running_loop())
+
+
+@app.on_event("shutdown")
+async def stop_change_feed():
+    change_feed.stop()
+
+
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
@@ -5,7 +5,10 @@ from .cam_frame import Cam_Frame
 from .ai_server import AI_Server
 from .camera import Camera
 from .incident import Incident
+from .incident_rollup import Incident_Rollup
 from .cam_ai_mapping import Cam_AI_Mapping
 from .ai_sequence import AI_Sequence
 from .ai_edge import AI_Edge
 from .ai_vertex import AI_Vertex
+from .report_job import Report_Job
+from .change_log import Change_Log
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, ForeignKey, Integer, Interval, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, Interval, String
 from sqlalchemy.dialects.postgresql import JSONB
 
 from app.db.base_class import Base
@@ -14,3 +14,8 @@ class Cam_Frame(Base):
     meta = Column(JSONB, nullable=True, default=None)
     image = Column(String, nullable=True, default=None)
     video = Column(String, nullable=True, default=None)
+
+    # used by `Camera.last_frame` and the frames retention
+    __table_args__ = (
+        Index('ix_cam_frame_camera_id_created_at', 'camera_id', 'created_at'),
+    )
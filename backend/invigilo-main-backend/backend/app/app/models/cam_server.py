@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Boolean
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -18,6 +18,8 @@ class Cam_Server(Base):
     access_token = Column(String, index=True, unique=True, nullable=True)
     is_active = Column(Boolean(), default=False)
     is_live = Column(Boolean(), default=False)
+    # last heartbeat, shared by the workers to expire `is_live`
+    last_seen = Column(DateTime, nullable=True, index=True)
     company_id = Column(Integer, ForeignKey("company.id"), index=True, nullable=True)
     company = relationship("Company", backref="cam_servers")
     # `notification_bot_type`: [{title: 'Chat title', 'chat_id': int, [disabled: bool]}]
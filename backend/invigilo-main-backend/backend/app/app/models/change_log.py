@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String
+
+from app.db.base_class import Base
+
+
+class Change_Log(Base):
+    '''
+    Row changes of the streamed tables written by the `notify_change` trigger,
+    `id` is the revision sent as id of the stream events
+    '''
+    table_name = Column(String, nullable=False, index=True)
+    row_id = Column(Integer, nullable=False)
+    # `None` when the row isn't linked to a cam server
+    cam_server_id = Column(Integer, nullable=True, index=True)
+    # `INSERT`, `UPDATE`, `DELETE`
+    op = Column(String, nullable=False)
@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING
 
 from sqlalchemy import Column, String
+from sqlalchemy.dialects.postgresql import JSONB
 
 from app.db.base_class import Base
 
@@ -8,3 +9,5 @@ class Company(Base):
     name = Column(String, index=True)
     description = Column(String, nullable=True)
     logo = Column(String, nullable=True)
+    # `frame_retention`: {hot_interval: int, downsample_interval: int, expire_interval: int, delete_uploads: bool}
+    meta = Column(JSONB, nullable=True)
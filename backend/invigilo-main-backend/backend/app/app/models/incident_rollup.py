@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event, inspect
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.sql import bindparam, text
+from sqlalchemy_utils import ScalarListType
+
+from app.db.base_class import Base
+from app.models.incident import Incident
+
+if TYPE_CHECKING:
+    from .cam_server import Cam_Server  # noqa: F401
+    from .camera import Camera  # noqa: F401
+    from .company import Company  # noqa: F401
+
+
+class Incident_Rollup(Base):
+    '''
+    Hourly count of incidents, maintained on incident insert and updates
+    '''
+    company_id = Column(Integer, ForeignKey("company.id"), index=True, nullable=True)
+    cam_server_id = Column(Integer, ForeignKey("cam_server.id"), index=True)
+    camera_id = Column(Integer, ForeignKey("camera.id"), index=True)
+    type = Column(ScalarListType())
+    bucket = Column(DateTime, nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+    inaccurate_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint('cam_server_id', 'camera_id', 'type', 'bucket',
+                         name='uq_incident_rollup_cam_server_id_camera_id_type_bucket'),
+    )
+
+
+ROLLUP_INCREMENT_SQL = text('''
+insert into incident_rollup (
+	company_id, cam_server_id, camera_id, type, bucket,
+	count, inaccurate_count, created_at, updated_at, deleted
+)
+select
+	cam_server.company_id,
+	camera.cam_server_id,
+	camera.id,
+	:type,
+	date_trunc('hour', cast(:created_at as timestamp)),
+	:count,
+	:inaccurate_count,
+	:now,
+	:now,
+	false
+from
+	camera
+join cam_server on
+	cam_server.id = camera.cam_server_id
+where
+	camera.id = :camera_id
+on conflict (cam_server_id, camera_id, type, bucket) do update set
+	company_id = excluded.company_id,
+	count = incident_rollup.count + excluded.count,
+	inaccurate_count = incident_rollup.inaccurate_count + excluded.inaccurate_count,
+	updated_at = excluded.updated_at
+''').bindparams(bindparam('type', type_=ScalarListType()))
+
+
+def rollup_contribution(deleted: bool, inaccurate: bool):
+    '''
+    Incident contribution as `(count, inaccurate_count)`
+    '''
+    if deleted:
+        return 0, 0
+    return 1, (1 if inaccurate else 0)
+
+
+def rollup_increment(connection, target: Incident, count: int, inaccurate_count: int, **key):
+    '''
+    Add the counts to the hour of `target`, `key` overrides its `type`, `camera_id` or `created_at`
+    '''
+    key = {'type': target.type, 'camera_id': target.camera_id, 'created_at': target.created_at, **key}
+    if not (count or inaccurate_count) or not key['camera_id']:
+        return
+    connection.execute(ROLLUP_INCREMENT_SQL, {
+        **key,
+        'count': count,
+        'inaccurate_count': inaccurate_count,
+        'now': datetime.utcnow(),
+    })
+
+
+def previous_value(attrs, key: str):
+    history = attrs[key].history
+    return history.deleted[0] if history.deleted else attrs[key].value
+
+
+# executed within the flush, so rollup is committed together with the incident
+@event.listens_for(Incident, 'after_insert')
+def receive_after_insert(mapper, connection, target):
+    rollup_increment(connection, target, *rollup_contribution(target.deleted, target.inaccurate))
+
+
+@event.listens_for(Incident, 'after_update')
+def receive_after_update(mapper, connection, target):
+    attrs = inspect(target).attrs
+    key_changed = any(attrs[key].history.has_changes() for key in ('type', 'camera_id', 'created_at'))
+    if not (key_changed or attrs.deleted.history.has_changes() or attrs.inaccurate.history.has_changes()):
+        return
+
+    count, inaccurate_count = rollup_contribution(target.deleted, target.inaccurate)
+    was_count, was_inaccurate_count = rollup_contribution(
+        previous_value(attrs, 'deleted'), previous_value(attrs, 'inaccurate')
+    )
+    if not key_changed:
+        rollup_increment(
+            connection, target,
+            count - was_count,
+            inaccurate_count - was_inaccurate_count
+        )
+        return
+
+    # moved to another hour, camera or type: taken out of the previous one
+    rollup_increment(
+        connection, target,
+        -was_count,
+        -was_inaccurate_count,
+        **{key: previous_value(attrs, key) for key in ('type', 'camera_id', 'created_at')}
+    )
+    rollup_increment(connection, target, count, inaccurate_count)
@@ -0,0 +1,32 @@
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+from app.db.base_class import Base
+
+if TYPE_CHECKING:
+    from .company import Company  # noqa: F401
+    from .user import User  # noqa: F401
+
+
+class Report_Job(Base):
+    '''
+    Report PDF generated by the worker, the file is stored in S3
+    '''
+    uuid = Column(UUID(as_uuid=True), index=True, unique=True, default=uuid4)
+    company_id = Column(Integer, ForeignKey("company.id"), index=True, nullable=True)
+    # `None` for reports of the periods generated by schedule
+    user_id = Column(Integer, ForeignKey("user.id"), index=True, nullable=True)
+    # `pending`, `running`, `done`, `failed`
+    status = Column(String, index=True, default='pending')
+    # steps of the layout done, out of `PdfReport.PROGRESS_STEPS`
+    progress = Column(Integer, default=0)
+    period = Column(String, nullable=True)
+    start = Column(DateTime, nullable=True)
+    end = Column(DateTime, nullable=True)
+    filters = Column(JSONB, nullable=True)
+    file = Column(String, nullable=True)
+    file_name = Column(String, nullable=True)
+    error = Column(String, nullable=True)
@@ -4,13 +4,17 @@ from .token import Token, TokenPayload
 from .user import User, UserCreate, UserInDB, UserUpdate, UserExtra, UserFilters
 from .company import Company, CompanyCreate, CompanyInDB, CompanyUpdate, CompanyFilters
 from .cam_server import Cam_Server, Cam_ServerExtra, Cam_ServerCreate, Cam_ServerInDB, Cam_ServerUpdate, CamServerFilters
-from .cam_frame import CameraFrame, CameraFrameCreate, CameraFrameUpdate, CameraFrameInDB
+from .cam_frame import CameraFrame, CameraFrameCreate, CameraFrameUpdate, CameraFrameInDB, CameraFrameRetention
 from .ai_server import AI_Server, AI_ServerCreate, AI_ServerInDB, AI_ServerUpdate, AI_ServerExtra, AIServerFilters
-from .camera import Camera, CameraExtra, CameraExtended, CameraCreate, CameraInDB, CameraUpdate, CameraStatus, CameraFilters, CameraStats
-from .incident import Incident, IncidentExtra, IncidentCreate, IncidentInDB, IncidentUpdate, IncidentFilters
+from .camera import Camera, CameraConfig, CameraExtra, CameraExtended, CameraCreate, CameraInDB, CameraUpdate, CameraStatus, CameraStatusItem, CameraStatusBulk, CameraFilters, CameraStats
+from .incident import Incident, IncidentExtra, IncidentCreate, IncidentInDB, IncidentUpdate, IncidentFilters, IncidentExportFormat
 from .ai_sequence import AI_Sequence, AI_SequenceExtra, AI_SequenceCreate, AI_SequenceInDB, AI_SequenceUpdate, AI_SequenceOut, AISequenceFilters
 from .ai_edge import AI_Edge, AI_EdgeCreate, AI_EdgeInDB, AI_EdgeUpdate
 from .cam_ai_mapping import Cam_AI_Mapping, Cam_AI_MappingCreate, Cam_AI_MappingInDB, Cam_AI_MappingUpdate
 from .ai_type import AI_Type, AI_TypeSimple, AI_TypeCreate, AI_TypeInDB, AI_TypeUpdate, AITypeFilters
 from .upload import Upload, TemporaryUpload
-from .report import ReportFilters, ReportServerMeter, ReportCamServerActivityTimeline, CamServerActivity, ReportInterventionFilters, ReportServerTypeCount, TypeCount
\ No newline at end of file
+from .report import ReportFilters, ReportServerMeter, ReportCamServerActivityTimeline, CamServerActivity, ReportInterventionFilters, ReportServerTypeCount, TypeCount
+from .report_job import ReportJob, ReportJobCreate, ReportJobUpdate, ReportJobStatus
+from .bridge_sync import BridgeSyncMessage, BridgeSyncMessageType
+from .bridge_config import BridgeConfig
+from .stream import StreamEncoding, StreamFormat, StreamCompression
@@ -0,0 +1,16 @@
+from typing import List
+
+from app.schemas.ai_sequence import AI_SequenceOut
+from app.schemas.ai_server import AI_Server
+from app.schemas.cam_ai_mapping import Cam_AI_Mapping
+from app.schemas.camera import CameraConfig
+from app.schemas.core import CoreModel
+
+
+# Configuration of the bridge, `version` is the hash of the content sent as ETag
+class BridgeConfig(CoreModel):
+    version: str = ''
+    cameras: List[CameraConfig] = []
+    ai_mapping: List[Cam_AI_Mapping] = []
+    ai_sequences: List[AI_SequenceOut] = []
+    ai_servers: List[AI_Server] = []
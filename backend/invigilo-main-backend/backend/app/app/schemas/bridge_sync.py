@@ -0,0 +1,30 @@
+from enum import Enum
+from typing import Dict, List, Optional
+
+from app.schemas.camera import CameraStatusItem
+from app.schemas.core import CoreModel
+
+
+class BridgeSyncMessageType(str, Enum):
+    SUBSCRIBE = 'subscribe'
+    UNSUBSCRIBE = 'unsubscribe'
+    HEARTBEAT = 'heartbeat'
+    CAMERA_STATUS = 'camera_status'
+    INCIDENT_ACK = 'incident_ack'
+
+
+# Message sent by the bridge on the sync WebSocket
+class BridgeSyncMessage(CoreModel):
+    type: BridgeSyncMessageType
+    # echoed back in the reply
+    ref: Optional[str]
+    # subscribe, unsubscribe
+    channels: List[str] = []
+    # subscribe, channel -> id of the last event received
+    revisions: Dict[str, int] = {}
+    # heartbeat
+    cameras: List[CameraStatusItem] = []
+    # camera_status, incident_ack
+    id: Optional[int]
+    # camera_status, required
+    is_live: Optional[bool]
@@ -3,6 +3,7 @@ from datetime import timedelta
 
 from pydantic import Json, root_validator
 
+from app.core.config import settings
 from app.schemas.core import CoreModel, IDModelMixin, DateTimeModelMixin
 from app.crud.crud_upload import upload
 
@@ -57,3 +58,11 @@ class CameraFrame(CameraFrameInDBBase):
 # Properties properties stored in DB
 class CameraFrameInDB(CameraFrameInDBBase):
     pass
+
+
+# Retention of the frames, stored in `Company.meta['frame_retention']`
+class CameraFrameRetention(CoreModel):
+    hot_interval: int = settings.CAM_FRAME_HOT_INTERVAL # in seconds
+    downsample_interval: int = settings.CAM_FRAME_DOWNSAMPLE_INTERVAL # in seconds
+    expire_interval: int = settings.CAM_FRAME_EXPIRE_INTERVAL # in seconds
+    delete_uploads: bool = settings.CAM_FRAME_DELETE_UPLOADS
@@ -51,6 +51,14 @@ class CameraStatus(CoreModel):
     is_live: bool = False
 
 
+class CameraStatusItem(CameraStatus):
+    id: int
+
+
+class CameraStatusBulk(CoreModel):
+    cameras: List[CameraStatusItem] = []
+
+
 # Properties shared by models stored in DB
 class CameraInDBBase(CameraBase, IDModelMixin, DateTimeModelMixin):
     name: str
@@ -64,6 +72,15 @@ class CameraInDBBase(CameraBase, IDModelMixin, DateTimeModelMixin):
 class Camera(CameraInDBBase):
     is_live: Optional[bool] = None
 
+
+# Properties of the bridge config, without `is_live` and timestamps changing the version
+class CameraConfig(CameraBase, IDModelMixin):
+    name: str
+    cam_server_id: int
+
+    class Config:
+        orm_mode = True
+
 # fmt: off
 from app.schemas.incident import Incident
 # fmt: on
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Dict, Optional, Union
 
-from pydantic import root_validator
+from pydantic import Json, root_validator
 from app.schemas.core import CoreModel, IDModelMixin, DateTimeModelMixin, QueryModel
 from app.crud.crud_upload import upload
 
@@ -23,6 +23,7 @@ class CompanyBase(CoreModel):
     name: str
     description: Optional[str] = ''
     logo: Optional[str] = None
+    meta: Optional[Union[Dict, Json]] = None
 
 
 # Properties to receive on Company creation
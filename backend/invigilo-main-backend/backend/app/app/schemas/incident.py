@@ -1,4 +1,5 @@
 from datetime import datetime
+from enum import Enum
 from typing import Dict, Optional, List, Union
 
 from pydantic import UUID4, BaseModel, Json, root_validator
@@ -8,6 +9,12 @@ from app.crud.crud_upload import upload
 from app.schemas.core import CoreModel, IDModelMixin, DateTimeModelMixin, QueryModel
 
 
+class IncidentExportFormat(str, Enum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+    PARQUET = 'parquet'
+
+
 class DateTimeInterval(BaseModel):
     start: Optional[datetime]
     end: Optional[datetime]
@@ -0,0 +1,46 @@
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional
+
+from pydantic import UUID4
+
+from app.schemas.core import CoreModel, DateTimeModelMixin
+
+# steps of the layout reported by `PdfReport.generate`, kept here so the API doesn't load the renderer
+REPORT_PROGRESS_STEPS = 7
+
+
+class ReportJobStatus(str, Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+# Shared properties
+class ReportJobBase(CoreModel):
+    status: Optional[ReportJobStatus] = ReportJobStatus.PENDING
+    progress: Optional[int] = 0
+    period: Optional[str]
+    start: Optional[datetime]
+    end: Optional[datetime]
+    file_name: Optional[str]
+    error: Optional[str]
+
+
+# Properties to receive on Report Job creation
+class ReportJobCreate(ReportJobBase):
+    company_id: Optional[int]
+    user_id: Optional[int]
+    filters: Optional[Dict]
+
+
+# Properties to receive on Report Job update
+class ReportJobUpdate(ReportJobBase):
+    file: Optional[str]
+
+
+# Properties to return to client
+class ReportJob(ReportJobBase, DateTimeModelMixin):
+    uuid: UUID4
+    steps: int = REPORT_PROGRESS_STEPS
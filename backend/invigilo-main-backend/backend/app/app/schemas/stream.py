@@ -0,0 +1,21 @@
+from enum import Enum
+
+from app.schemas.core import CoreModel
+
+
+class StreamFormat(str, Enum):
+    JSON = 'json'
+    MSGPACK = 'msgpack'
+
+
+class StreamCompression(str, Enum):
+    NONE = 'none'
+    ZLIB = 'zlib'
+
+
+# Encoding of the stream events requested by the client
+class StreamEncoding(CoreModel):
+    # `updated` records as JSON patch against the record sent before
+    patch: bool = False
+    format: StreamFormat = StreamFormat.JSON
+    compression: StreamCompression = StreamCompression.NONE
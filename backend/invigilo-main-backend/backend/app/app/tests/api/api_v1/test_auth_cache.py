@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.schemas.user import UserCreate
+from app.tests.utils.user import user_authentication_headers
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def create_user_headers(client: TestClient, db: Session):
+    email = random_email()
+    password = random_lower_string()
+    user = crud.user.create(db, obj_in=UserCreate(email=email, password=password))
+    headers = user_authentication_headers(client=client, email=email, password=password)
+    return user, headers
+
+
+def test_deactivated_user_not_cached(client: TestClient, db: Session) -> None:
+    user, headers = create_user_headers(client, db)
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+
+    crud.user.update(db, db_obj=user, obj_in={"is_active": False})
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 400
+
+
+def test_removed_user_not_cached(client: TestClient, db: Session) -> None:
+    user, headers = create_user_headers(client, db)
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+
+    crud.user.remove(db, id=user.id)
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 404
@@ -0,0 +1,42 @@
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.core.bridge_config import build_bridge_config
+from app.schemas.camera import CameraStatus, CameraUpdate
+from app.tests.utils.camera import create_random_cam_server, create_random_camera
+from app.tests.utils.utils import random_lower_string
+
+
+def create_sequence_on_cameras(db: Session, server: models.Cam_Server, cameras_count: int = 2) -> models.AI_Server:
+    ai_server = models.AI_Server(name=random_lower_string(), company_id=server.company_id, is_active=True)
+    sequence = models.AI_Sequence(name=random_lower_string(), company_id=server.company_id)
+    db.add_all([ai_server, sequence])
+    db.flush()
+    for _ in range(cameras_count):
+        camera = create_random_camera(db, cam_server_id=server.id)
+        db.add(models.AI_Vertex(name=random_lower_string(), types=[], server_id=ai_server.id, sequence_id=sequence.id))
+        db.add(models.Cam_AI_Mapping(name=random_lower_string(), sequence_id=sequence.id, camera_id=camera.id))
+    db.commit()
+    return ai_server
+
+
+def test_get_multi_by_link_distinct(db: Session) -> None:
+    server = create_random_cam_server(db)
+    ai_server = create_sequence_on_cameras(db, server)
+
+    ai_servers = crud.ai_server.get_multi_by_link(db, cam_server_id=server.id, company_id=server.company_id)
+    assert [item.id for item in ai_servers] == [ai_server.id]
+    sequences = crud.ai_sequence.get_multi_by_link(db, cam_server_id=server.id)
+    assert len(sequences) == 1
+
+
+def test_bridge_config_version_ignores_is_live(db: Session) -> None:
+    server = create_random_cam_server(db)
+    camera = create_random_camera(db, cam_server_id=server.id)
+    version, body = build_bridge_config(db, server)
+
+    crud.camera.update_status(db, db_obj=camera, obj_in=CameraStatus(is_live=not camera.is_live))
+    assert build_bridge_config(db, server) == (version, body)
+
+    crud.camera.update(db, db_obj=camera, obj_in=CameraUpdate(name=random_lower_string()))
+    assert build_bridge_config(db, server)[0] != version
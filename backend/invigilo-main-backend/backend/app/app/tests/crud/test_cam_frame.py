@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.schemas.company import CompanyCreate
+from app.tests.utils.camera import create_random_cam_server, create_random_camera
+from app.tests.utils.utils import random_lower_string
+
+
+def test_apply_retention(db: Session) -> None:
+    company = crud.company.create(db, obj_in=CompanyCreate(
+        name=random_lower_string(),
+        meta={'frame_retention': {
+            'hot_interval': 60 * 60,
+            'downsample_interval': 10 * 60,
+            'expire_interval': 24 * 60 * 60,
+            'delete_uploads': True,
+        }}
+    ))
+    server = create_random_cam_server(db, company_id=company.id)
+    camera = create_random_camera(db, cam_server_id=server.id)
+    # aligned to the downsample buckets
+    now = datetime(2026, 1, 10, 12, 0)
+
+    def create_frame(created_at: datetime, image: str = None) -> models.Cam_Frame:
+        frame = models.Cam_Frame(camera_id=camera.id, created_at=created_at, image=image)
+        db.add(frame)
+        return frame
+
+    hot = [create_frame(now - timedelta(minutes=10)), create_frame(now - timedelta(minutes=11))]
+    replaced = create_frame(now - timedelta(hours=2) + timedelta(minutes=1), image='replaced.jpg')
+    latest = create_frame(now - timedelta(hours=2) + timedelta(minutes=5))
+    other_bucket = create_frame(now - timedelta(hours=2) + timedelta(minutes=12))
+    expired = create_frame(now - timedelta(days=2), image='expired.jpg')
+    db.commit()
+    kept_ids = {frame.id for frame in [*hot, latest, other_bucket]}
+    removed_ids = {replaced.id, expired.id}
+
+    result = crud.cam_frame.apply_retention(db, company=company, now=now)
+    assert result['downsampled'] == 1
+    assert result['expired'] == 1
+    assert sorted(result['uploads']) == ['expired.jpg', 'replaced.jpg']
+
+    ids = {
+        frame_id for (frame_id,) in
+        db.query(models.Cam_Frame.id).filter(models.Cam_Frame.camera_id == camera.id).all()
+    }
+    assert ids == kept_ids
+    assert not ids & removed_ids
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.crud.crud_incident_rollup import floor_hour
+from app.tests.utils.camera import create_random_cam_server, create_random_camera
+from app.tests.utils.incident import create_incident_at
+
+
+def counts_by_type(db: Session, company_id: int, start: datetime, end: datetime) -> dict:
+    return {
+        row.type_index: row.i_count
+        for row in crud.incident_rollup.get_counts(db, company_id=company_id, start=start, end=end, by_type=True)
+    }
+
+
+def test_get_counts_rebuild(db: Session) -> None:
+    server = create_random_cam_server(db)
+    camera = create_random_camera(db, cam_server_id=server.id)
+    hour = floor_hour(datetime.utcnow())
+    start = hour - timedelta(hours=5, minutes=30)
+    end = datetime.utcnow()
+
+    # edge of the range, closed hours and the current hour
+    create_incident_at(db, camera=camera, created_at=hour - timedelta(hours=5, minutes=10), type=[1])
+    create_incident_at(db, camera=camera, created_at=hour - timedelta(hours=4, minutes=55), type=[1, 2])
+    create_incident_at(db, camera=camera, created_at=hour - timedelta(hours=4, minutes=10), type=[2], inaccurate=True)
+    create_incident_at(db, camera=camera, created_at=hour - timedelta(hours=2), type=[2])
+    create_incident_at(db, camera=camera, created_at=end - timedelta(seconds=1), type=[1])
+    # out of the range
+    create_incident_at(db, camera=camera, created_at=start - timedelta(minutes=1), type=[1])
+    expected = {'1': 3, '2': 2}
+
+    assert counts_by_type(db, server.company_id, start, end) == expected
+    totals = crud.incident_rollup.get_counts(db, company_id=server.company_id, start=start, end=end)
+    assert [(row.cam_server_id, row.i_count) for row in totals] == [(server.id, 4)]
+
+    crud.incident_rollup.rebuild(db, start=start, end=end)
+    assert counts_by_type(db, server.company_id, start, end) == expected
+
+
+def test_get_counts_after_type_update(db: Session) -> None:
+    server = create_random_cam_server(db)
+    camera = create_random_camera(db, cam_server_id=server.id)
+    other_camera = create_random_camera(db, cam_server_id=server.id)
+    hour = floor_hour(datetime.utcnow())
+    start = hour - timedelta(hours=3)
+    end = datetime.utcnow()
+
+    incident = create_incident_at(db, camera=camera, created_at=hour - timedelta(hours=2), type=[1])
+    create_incident_at(db, camera=camera, created_at=hour - timedelta(hours=2), type=[1])
+    moved = create_incident_at(db, camera=camera, created_at=hour - timedelta(hours=2), type=[2])
+
+    incident.type = [2]
+    moved.camera_id = other_camera.id
+    moved.created_at = hour - timedelta(hours=1)
+    db.commit()
+    counts = counts_by_type(db, server.company_id, start, end)
+    assert counts == {'1': 1, '2': 2}
+
+    # the same counts from raw incidents
+    crud.incident_rollup.rebuild(db, start=start, end=end)
+    assert counts_by_type(db, server.company_id, start, end) == counts
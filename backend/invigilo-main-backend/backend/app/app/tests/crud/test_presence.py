@@ -0,0 +1,23 @@
+from sqlalchemy.orm import Session
+
+from app.core.presence import PresenceTracker
+from app.tests.utils.camera import create_random_cam_server, create_random_camera
+
+
+def test_heartbeat_after_expire_by_other_worker(db: Session) -> None:
+    server = create_random_cam_server(db)
+    camera = create_random_camera(db, cam_server_id=server.id)
+    tracker = PresenceTracker(ttl=0)
+    other_worker = PresenceTracker(ttl=0)
+
+    assert tracker.heartbeat(db, server.id, {camera.id: True}) == {camera.id: True}
+    assert server.id in other_worker.expire(db)
+    db.refresh(camera)
+    assert camera.is_live is False
+
+    # the state is read from database, not from the previous heartbeat
+    assert tracker.heartbeat(db, server.id, {camera.id: True}) == {camera.id: True}
+    db.refresh(camera)
+    db.refresh(server)
+    assert camera.is_live is True
+    assert server.is_live is True
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.reports import pie_count_data
+from app.schemas.report import ReportFilters
+from app.tests.utils.camera import create_random_cam_server, create_random_camera
+from app.tests.utils.incident import create_random_ai_mapping, create_random_incident
+
+
+def server_count(db: Session, filters: ReportFilters, company_id: int) -> int:
+    return sum(meter.value for meter in pie_count_data(db, filters, company_id))
+
+
+def test_report_cache_invalidated_by_incidents(db: Session) -> None:
+    server = create_random_cam_server(db)
+    camera = create_random_camera(db, cam_server_id=server.id)
+    ai_mapping = create_random_ai_mapping(db, camera)
+    now = datetime.utcnow()
+    filters = ReportFilters(start=now - timedelta(hours=1), end=now + timedelta(hours=1))
+
+    assert server_count(db, filters, server.company_id) == 0
+
+    incident = create_random_incident(db, ai_mapping=ai_mapping)
+    assert server_count(db, filters, server.company_id) == 1
+
+    crud.incident.update(db, db_obj=incident, obj_in={'inaccurate': True})
+    assert server_count(db, filters, server.company_id) == 0
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.core.link_streams import link_stream
+from app.core.stream_hub import stream_hub
+from app.db.session import SessionLocal
+from app.tests.utils.camera import create_random_cam_server, create_random_camera
+from app.tests.utils.utils import random_lower_string
+
+
+def listen_cameras(server: models.Cam_Server, revision: int = None) -> AsyncIterator:
+    return stream_hub.listen(revision=revision, idle_timeout=60, stream_delay=1, **link_stream('cameras', server))
+
+
+async def next_event(events: AsyncIterator) -> Tuple[int, Dict[str, Any]]:
+    revision, event = await asyncio.wait_for(events.__anext__(), timeout=15)
+    return revision, event.response
+
+
+async def receive_ids(events: AsyncIterator, ids: Set[int], event: str = 'new') -> int:
+    ids = set(ids)
+    while ids:
+        revision, response = await next_event(events)
+        if event == 'removed':
+            ids -= set(response['removed'])
+        else:
+            ids -= {record['id'] for record in response[event]}
+    return revision
+
+
+async def collect(events: AsyncIterator) -> List:
+    return [event async for event in events]
+
+
+def test_stream_changes_committed_out_of_order(db: Session) -> None:
+    server = create_random_cam_server(db)
+
+    async def run() -> None:
+        events = listen_cameras(server)
+        late = SessionLocal()
+        try:
+            await next_event(events)
+            # the change of the camera is logged before the other but committed after it
+            camera_late = models.Camera(name=random_lower_string(), cam_server_id=server.id)
+            late.add(camera_late)
+            late.flush()
+            camera = create_random_camera(db, cam_server_id=server.id)
+            await receive_ids(events, {camera.id})
+            late.commit()
+            await receive_ids(events, {camera_late.id})
+        finally:
+            await events.aclose()
+            late.close()
+
+    asyncio.run(run())
+
+
+def test_stream_replay_removed_after_reconnect(db: Session) -> None:
+    server = create_random_cam_server(db)
+    camera = create_random_camera(db, cam_server_id=server.id)
+
+    async def run() -> None:
+        events = listen_cameras(server)
+        revision, response = await next_event(events)
+        assert camera.id in {record['id'] for record in response['new']}
+        # the stream is closed with its last connection
+        await events.aclose()
+
+        crud.camera.remove(db, id=camera.id)
+        events = listen_cameras(server, revision)
+        try:
+            await receive_ids(events, {camera.id}, event='removed')
+        finally:
+            await events.aclose()
+
+    asyncio.run(run())
+
+
+def test_stream_replay_ends_when_stream_fails(db: Session) -> None:
+    def pull_fn(*args: Any, **kwargs: Any) -> List:
+        raise RuntimeError('pull failed')
+
+    async def run() -> None:
+        events = stream_hub.listen(pull_fn, revision=1, tables=['camera'], cam_server_id=0)
+        try:
+            # the connection ends instead of waiting for the snapshot
+            received = await asyncio.wait_for(collect(events), timeout=15)
+            assert received == []
+        finally:
+            await events.aclose()
+
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+import base64
+import copy
+import zlib
+from typing import Any, Dict, List
+
+import orjson
+
+from app.core.stream_encoding import StreamEvent, json_patch
+from app.schemas.stream import StreamCompression, StreamEncoding
+
+
+def apply_patch(document: Any, operations: List[Dict[str, Any]]) -> Any:
+    document = copy.deepcopy(document)
+    for operation in operations:
+        keys = [key.replace('~1', '/').replace('~0', '~') for key in operation['path'].split('/')[1:]]
+        if not keys:
+            document = operation['value']
+            continue
+        parent = document
+        for key in keys[:-1]:
+            parent = parent[int(key) if isinstance(parent, list) else key]
+        key = int(keys[-1]) if isinstance(parent, list) else keys[-1]
+        if operation['op'] == 'remove':
+            del parent[key]
+        else:
+            parent[key] = operation['value']
+    return document
+
+
+def test_json_patch_round_trip() -> None:
+    old = {'id': 1, 'name': 'a', 'meta': {'zone/1': [1, 2], 'a~b': None}, 'vertexes': [{'id': 1}, {'id': 2}]}
+    changes = [
+        {**old, 'name': 'b'},
+        {'id': 1, 'meta': {'zone/1': [1, 3], 'a~b': 'x'}, 'vertexes': [{'id': 1, 'name': 'v'}, {'id': 2}]},
+        {**old, 'vertexes': [{'id': 1}], 'types': [5]},
+        {**old, 'meta': None},
+        old,
+    ]
+    for new in changes:
+        assert apply_patch(old, json_patch(old, new)) == new
+    assert json_patch(old, old) == []
+
+
+def test_stream_event_encoding() -> None:
+    previous = {1: {'id': 1, 'name': 'a', 'is_active': True}}
+    record = {'id': 1, 'name': 'b', 'is_active': True}
+    new = {'id': 2, 'name': 'c', 'is_active': False}
+    event = StreamEvent({'new': [new], 'updated': [record], 'removed': [3]}, previous)
+
+    payload = orjson.loads(event.encode(StreamEncoding(patch=True)))
+    assert payload['new'] == [new]
+    assert payload['removed'] == [3]
+    assert payload['updated'] == [{'id': 1, 'patch': [{'op': 'replace', 'path': '/name', 'value': 'b'}]}]
+    assert apply_patch(previous[1], payload['updated'][0]['patch']) == record
+
+    encoding = StreamEncoding(compression=StreamCompression.ZLIB)
+    assert zlib.decompress(base64.b64decode(event.text(encoding))) == event.encode()
+    # encoded once per encoding
+    assert event.encode(encoding) is event.encode(encoding)
@@ -0,0 +1,33 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.schemas.cam_server import Cam_ServerCreate
+from app.schemas.camera import CameraCreate
+from app.schemas.company import CompanyCreate
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_company(db: Session) -> models.Company:
+    company_in = CompanyCreate(name=random_lower_string())
+    return crud.company.create(db=db, obj_in=company_in)
+
+
+def create_random_cam_server(db: Session, *, company_id: Optional[int] = None) -> models.Cam_Server:
+    if company_id is None:
+        company_id = create_random_company(db).id
+    server_in = Cam_ServerCreate(
+        name=random_lower_string(),
+        company_id=company_id,
+        access_token=random_lower_string(),
+        is_active=True,
+    )
+    return crud.cam_server.create(db=db, obj_in=server_in)
+
+
+def create_random_camera(db: Session, *, cam_server_id: Optional[int] = None) -> models.Camera:
+    if cam_server_id is None:
+        cam_server_id = create_random_cam_server(db).id
+    camera_in = CameraCreate(name=random_lower_string(), cam_server_id=cam_server_id, is_active=True)
+    return crud.camera.create(db=db, obj_in=camera_in)
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.schemas.incident import IncidentCreate
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_ai_mapping(db: Session, camera: models.Camera) -> models.Cam_AI_Mapping:
+    sequence = models.AI_Sequence(name=random_lower_string(), company_id=camera.cam_server.company_id)
+    db.add(sequence)
+    db.flush()
+    ai_mapping = models.Cam_AI_Mapping(name=random_lower_string(), sequence_id=sequence.id, camera_id=camera.id)
+    db.add(ai_mapping)
+    db.commit()
+    return ai_mapping
+
+
+def create_random_incident(db: Session, *, ai_mapping: models.Cam_AI_Mapping, type: List[int] = [1]) -> models.Incident:
+    incident_in = IncidentCreate(type=type, ai_mapping_id=ai_mapping.id)
+    return crud.incident.create(db=db, obj_in=incident_in)
+
+
+def create_incident_at(
+    db: Session, *, camera: models.Camera, created_at: datetime, type: List[int] = [1], inaccurate: bool = False
+) -> models.Incident:
+    # `created_at` of the past, the rollup is updated on flush
+    incident = models.Incident(camera_id=camera.id, created_at=created_at, type=type, inaccurate=inaccurate)
+    db.add(incident)
+    db.commit()
+    return incident
@@ -1,7 +1,15 @@
+from datetime import datetime, timedelta
+from typing import List
+
 from raven import Client
 
+from app import crud
 from app.core.celery_app import celery_app
 from app.core.config import settings
+from app.core.reports import build_report_pdf, schedule_period_reports
+from app.db.session import SessionLocal
+from app.schemas.report import ReportInterventionFilters
+from app.schemas.report_job import ReportJobStatus
 
 client_sentry = Client(settings.SENTRY_DSN)
 
@@ -13,4 +21,87 @@ def test_celery(word: str) -> str:
 @celery_app.task(acks_late=True)
 def detector_changed(detector):
     print('Detector changed', detector)
-    return detector
\ No newline at end of file
+    return detector
+
+
+@celery_app.task(acks_late=True)
+def cam_frame_retention() -> dict:
+    db = SessionLocal()
+    result = {'downsampled': 0, 'expired': 0, 'uploads': 0}
+    try:
+        # `None` for cameras of servers without company
+        for company in [None, *db.query(crud.company.model).all()]:
+            company_result = crud.cam_frame.apply_retention(db, company=company)
+            result['downsampled'] += company_result['downsampled']
+            result['expired'] += company_result['expired']
+            uploads = company_result['uploads']
+            if uploads:
+                result['uploads'] += len(uploads)
+                for i in range(0, len(uploads), 1000):
+                    celery_app.send_task("app.worker.remove_uploads", args=[uploads[i:i + 1000]])
+    finally:
+        db.close()
+    return result
+
+
+@celery_app.task(acks_late=True)
+def change_log_trim() -> int:
+    db = SessionLocal()
+    try:
+        before = datetime.utcnow() - timedelta(seconds=settings.CHANGE_LOG_RETENTION)
+        return crud.change_log.trim(db, before)
+    finally:
+        db.close()
+
+
+@celery_app.task(acks_late=True)
+def remove_uploads(object_keys: List[str]) -> int:
+    return crud.upload.remove_objects(object_keys)
+
+
+@celery_app.task(acks_late=True)
+def report_pdf(job_id: int) -> str:
+    db = SessionLocal()
+    try:
+        job = crud.report_job.get(db, job_id)
+        if not job or job.status == ReportJobStatus.DONE:
+            return None
+        job = crud.report_job.update(db, db_obj=job, obj_in={
+            'status': ReportJobStatus.RUNNING, 'progress': 0, 'error': None
+        })
+        try:
+            file_name, pdf_file = build_report_pdf(
+                db,
+                ReportInterventionFilters(**job.filters),
+                job.company_id,
+                progress=lambda step: crud.report_job.set_progress(db, id=job.id, progress=step)
+            )
+            object_key = crud.upload.put_object(
+                f'reports/{job.company_id}/{job.uuid}.pdf', pdf_file, 'application/pdf'
+            )
+            if not object_key:
+                raise Exception("Upload of the report failed")
+            crud.report_job.update(db, db_obj=job, obj_in={
+                'status': ReportJobStatus.DONE, 'file': object_key, 'file_name': file_name
+            })
+        except Exception as e:
+            db.rollback()
+            crud.report_job.update(db, db_obj=job, obj_in={
+                'status': ReportJobStatus.FAILED, 'error': str(e)
+            })
+            client_sentry.captureException()
+        return job.status
+    finally:
+        db.close()
+
+
+@celery_app.task(acks_late=True)
+def period_reports() -> int:
+    db = SessionLocal()
+    try:
+        jobs = schedule_period_reports(db)
+        for job in jobs:
+            celery_app.send_task("app.worker.report_pdf", args=[job.id])
+        return len(jobs)
+    finally:
+        db.close()
@@ -41,7 +41,27 @@
             <td><img src="graph://pie/pie_location?width=4&height=4&title=Incidents per location&legend" /></td>
         </tr>
     </table>
+    %if incidents_summary:
+    <h2 class="incident-list-title">Incident summary</h2>
+    <table class="incident-table">
+        <tr>
+            <th class="incident-col-details">Location</th>
+            <th class="incident-col-details">Violation type</th>
+            <th class="incident-col-id">Count</th>
+        </tr>
+        % for row in incidents_summary:
+        <tr>
+            <td>${row.location}</td>
+            <td>${", ".join(type_names(row.type))}</td>
+            <td>${row.count}</td>
+        </tr>
+        % endfor
+    </table>
+    %endif
     <h2 class="incident-list-title">Incident list</h2>
+    %if incidents_total > len(incidents):
+    <p class="incident-list-note">Listed first ${len(incidents)} of ${incidents_total} incidents.</p>
+    %endif
     <table class="incident-table">
         <tr>
             <th class="incident-col-id">Sr. No</th>
@@ -76,7 +96,11 @@
             <tr>
                 <td>${index + 1}</td>
                 <td>${make_description(row)}</td>
-                <td><img src="${row.frame_url}" class="incident-frame"></td>
+                <td>
+                    %if row.frame_url:
+                    <img src="${row.frame_url}" class="incident-frame">
+                    %endif
+                </td>
             </tr>
         </%def>
         % for row in incidents:
@@ -0,0 +1,16 @@
+#!/usr/bin/env bash
+
+# Import time of the app by module, slowest first (cumulative microseconds)
+# usage: scripts/import-time.sh [module=app.main] [lines=30]
+
+set -e
+
+MODULE=${1:-app.main}
+LINES=${2:-30}
+
+python -c "import time; start = time.perf_counter(); import ${MODULE}; print(f'import ${MODULE}: {time.perf_counter() - start:.3f}s')"
+
+python -X importtime -c "import ${MODULE}" 2>&1 >/dev/null \
+    | grep -v 'self \[us\]' \
+    | sort -t '|' -k 2,2 -n -r \
+    | head -n "${LINES}"